@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of zenforms tags on synthetic forms.
+
+Every case renders one template with ``{% izenform %}``, ``{% zenform %}`` with
+fieldsets and multifields, ``{% zenformset %}``, ``{% readonly %}`` or
+``{% submit %}``; Django's ``as_p`` is measured on the same forms as baseline.
+Results are: time per render and per field, zenforms template lookups per
+render, bytes of output per field and, when ``tracemalloc`` is available
+(Python 3), peak memory of one render; on Python 2 ``peak`` is ``None``.
+Timings are compared with the baseline relative to Django's ``as_p`` of the
+same forms, so baseline recorded on another machine is still meaningful. ``whitespace_savings`` compares output with and without
+``ZENFORMS_STRIP_WHITESPACE``.
+With Jinja2 installed ``jinja_*`` cases render the same forms with
+``zenforms.jinja`` extension. ``select_*`` cases render one select with
+thousands of static choices.
+
+Run ``./manage.py benchmark`` in the example project, see its ``--help``.
+"""
+import json
+import time
+
+from django import forms
+from django.forms.formsets import formset_factory
+from django.template import Template, Context
+from django.test.utils import override_settings
+
+from zenforms.loading import registry
+from .models import Profile
+
+try:
+    import tracemalloc
+except ImportError:  # python 2 without pytracemalloc
+    tracemalloc = None
+
+try:
+    from zenforms.jinja import jinja_environment
+except ImportError:  # jinja2 is not installed
+    jinja_environment = None
+
+SIZES = (10, 100, 1000)
+ROWS = (10, 100, 2000)
+QUICK_SIZES = (10,)
+QUICK_ROWS = (10,)
+OPTIONS = (10000,)
+QUICK_OPTIONS = (1000,)
+
+FIELD_TYPES = (
+    lambda: forms.CharField(max_length=100),
+    lambda: forms.EmailField(required=False, help_text='Email address'),
+    lambda: forms.IntegerField(),
+    lambda: forms.ChoiceField(choices=[(str(i), 'Choice %d' % i) for i in range(5)]),
+    lambda: forms.BooleanField(required=False),
+    lambda: forms.DateField(required=False),
+)
+
+
+def make_form_class(size):
+    fields = {}
+    for index in range(size):
+        fields['field%04d' % index] = FIELD_TYPES[index % len(FIELD_TYPES)]()
+    return type('Synthetic%dForm' % size, (forms.Form,), fields)
+
+
+def make_select_form_class(count):
+    choices = [(str(index), 'Option %d' % index) for index in range(count)]
+    return type('Select%dForm' % count, (forms.Form,), {'option': forms.ChoiceField(choices=choices)})
+
+
+class CardForm(forms.Form):
+    cardholder = forms.CharField(max_length=64)
+    number = forms.CharField(max_length=16)
+    valid_thru = forms.DateField()
+    primary = forms.BooleanField(required=False)
+
+
+def zenform_source(size):
+    """
+    Template with fieldsets of ten fields, the first fieldset has a multifield.
+    """
+    names = ['field%04d' % index for index in range(size)]
+    bits = ["{% load zenforms %}{% zenform form options notag=1 %}",
+        "{% multifield '" + names[0] + "' '" + names[1] + "' as pair label 'Pair' %}"]
+    for start in range(0, size, 10):
+        chunk = names[start:start + 10]
+        if start == 0:
+            chunk = ['pair'] + ["'%s'" % name for name in chunk[2:]]
+        else:
+            chunk = ["'%s'" % name for name in chunk]
+        bits.append("{%% fieldset %s title 'Fieldset %d' %%}" % (' '.join(chunk), start))
+    bits.append("{% fieldset unused_fields %}{% endzenform %}")
+    return ''.join(bits)
+
+
+class Case(object):
+
+    def __init__(self, name, source, context, fields, number=None):
+        self.name = name
+        self.template = Template(source)
+        self.context = context
+        self.fields = fields
+        self.number = number or max(1, 1000 // fields)
+
+    def render(self):
+        return self.template.render(Context(self.context()))
+
+
+class JinjaCase(Case):
+
+    def __init__(self, name, source, context, fields, number=None):
+        super(JinjaCase, self).__init__(name, '', context, fields, number)
+        self.template = jinja_environment().from_string(source.replace('{% load zenforms %}', ''))
+
+    def render(self):
+        return self.template.render(self.context())
+
+
+def build_cases(sizes=SIZES, rows=ROWS, options=OPTIONS):
+    cases = []
+    for size in sizes:
+        form_class = make_form_class(size)
+        context = lambda form_class=form_class: {'form': form_class(), 'csrf_token': 'token'}
+        cases.extend([
+            Case('as_p/%d' % size, '{{ form.as_p }}', context, size),
+            Case('izenform/%d' % size, '{% load zenforms %}{% izenform form %}', context, size),
+            Case('zenform/%d' % size, zenform_source(size), context, size),
+        ])
+        if jinja_environment is not None:
+            cases.extend([
+                JinjaCase('jinja_izenform/%d' % size, '{% izenform form %}', context, size),
+                JinjaCase('jinja_zenform/%d' % size, zenform_source(size), context, size),
+            ])
+        profile = Profile(address='Main st.', sex='F', age=30, phone1='555-01', vip=True)
+        groups = max(1, size // 3)
+        source = ("{% load zenforms %}" +
+            "{% readonly profile 'address' 'sex' 'age' label 'Profile' display choices %}" * groups)
+        cases.append(Case('readonly/%d' % size, source, lambda profile=profile: {'profile': profile}, groups * 3))
+        cases.append(Case('submit/%d' % size, "{% load zenforms %}" + "{% submit 'Save' %}" * size,
+            lambda: {}, size))
+    for count in rows:
+        formset_class = formset_factory(CardForm, extra=count)
+        context = lambda formset_class=formset_class: {'formset': formset_class(), 'csrf_token': 'token'}
+        fields = count * len(CardForm.base_fields)
+        cases.extend([
+            Case('formset_as_p/%d' % count, '{{ formset.as_p }}', context, fields),
+            Case('zenformset/%d' % count, '{% load zenforms %}{% zenformset formset %}{% endzenformset %}',
+                context, fields),
+            Case('zenformset_fieldset/%d' % count, "{% load zenforms %}{% zenformset formset %}"
+                "{% fieldset 'cardholder' 'number' title 'Card' %}{% fieldset unused_fields %}{% endzenformset %}",
+                context, fields),
+        ])
+    for count in options:
+        form_class = make_select_form_class(count)
+        context = lambda form_class=form_class, count=count: {'form': form_class({'option': str(count // 2)})}
+        number = max(1, 100000 // count)
+        cases.extend([
+            Case('select_as_p/%d' % count, '{{ form.as_p }}', context, 1, number),
+            Case('select_izenform/%d' % count, '{% load zenforms %}{% izenform form options nocsrf=1 %}',
+                context, 1, number),
+        ])
+    return cases
+
+
+def measure(case, repeat=3):
+    case.render()  # warm up caches
+    best = None
+    for i in range(repeat):
+        start = time.time()
+        for j in range(case.number):
+            case.render()
+        elapsed = (time.time() - start) / case.number
+        if best is None or elapsed < best:
+            best = elapsed
+    stats = registry.stats()
+    output = case.render()
+    after = registry.stats()
+    lookups = after['loads'] + after['saved'] - stats['loads'] - stats['saved']
+    peak = None
+    if tracemalloc is not None:
+        tracemalloc.start()
+        case.render()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return {
+        'time': best,
+        'per_field': best / case.fields,
+        'lookups': lookups,
+        'bytes': len(output) / float(case.fields),
+        'peak': peak,
+    }
+
+
+def reference(name):
+    """
+    Returns name of Django case, which the case is measured against: ``as_p``
+    of the same form, ``formset_as_p`` of the same formset.
+    """
+    kind, size = name.split('/')
+    if kind.startswith('zenformset') or kind == 'formset_as_p':
+        return 'formset_as_p/%s' % size
+    if kind.startswith('select_'):
+        return 'select_as_p/%s' % size
+    return 'as_p/%s' % size
+
+
+def run(cases, repeat=3, names=None):
+    """
+    Measures cases with any of ``names`` in their names (all cases by default)
+    and Django cases they are compared against.
+    """
+    selected = set(case.name for case in cases
+        if not names or any(name in case.name for name in names))
+    selected.update([reference(name) for name in selected])
+    results = {}
+    for case in cases:
+        if case.name in selected:
+            results[case.name] = measure(case, repeat)
+    return results
+
+
+def whitespace_savings(cases, names=None):
+    """
+    Returns bytes per field of every case without and with whitespace stripping.
+    """
+    results = {}
+    for case in cases:
+        if names and not any(name in case.name for name in names):
+            continue
+        plain = len(case.render())
+        with override_settings(ZENFORMS_STRIP_WHITESPACE=True):
+            stripped = len(case.render())
+        results[case.name] = (plain / float(case.fields), stripped / float(case.fields))
+    return results
+
+
+def relative_time(results, name):
+    """
+    Returns time of the case in times of its Django reference case, ``None``
+    for reference cases themselves and cases without measured reference.
+    """
+    base = reference(name)
+    if base == name or base not in results:
+        return None
+    return results[name]['time'] / results[base]['time']
+
+
+def compare(results, baseline, threshold=1.3):
+    """
+    Returns list of regressions: cases which are slower than baseline more than
+    ``threshold`` times, or do more template lookups than baseline. Times are
+    compared relative to the Django reference cases (see ``reference``), so the
+    baseline doesn't depend on speed of the machine it was recorded on.
+    """
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            continue
+        expected = baseline[name]
+        current, recorded = relative_time(results, name), relative_time(baseline, name)
+        if current is not None and recorded is not None and current / recorded > threshold:
+            regressions.append('%s: %.2f times slower (%.2f of %s, baseline %.2f)' % (
+                name, current / recorded, current, reference(name), recorded))
+        if result['lookups'] > expected['lookups']:
+            regressions.append('%s: %d template lookups, baseline %d' % (
+                name, result['lookups'], expected['lookups']))
+    return regressions
+
+
+def load(path):
+    return json.loads(open(path).read())
+
+
+def save(results, path):
+    open(path, 'w').write(json.dumps(results, indent=2, sort_keys=True))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import os
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from example import benchmarks
+
+BASELINE = os.path.join(os.path.dirname(benchmarks.__file__), 'benchmarks.json')
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks zenforms tags and compares results with the baseline.'
+    args = '[case name ...]'
+    option_list = BaseCommand.option_list + (
+        make_option('--baseline', dest='baseline', default=BASELINE,
+            help='Baseline json file.'),
+        make_option('--save', action='store_true', dest='save', default=False,
+            help='Save results as the new baseline.'),
+        make_option('--threshold', dest='threshold', type='float', default=1.3,
+            help='Fail, when a case is slower than baseline more than this number of times.'),
+        make_option('--repeat', dest='repeat', type='int', default=3,
+            help='Number of measurements of every case, the best one is used.'),
+        make_option('--quick', action='store_true', dest='quick', default=False,
+            help='Only the smallest forms and formsets.'),
+        make_option('--whitespace', action='store_true', dest='whitespace', default=False,
+            help='Show bytes per field saved by ZENFORMS_STRIP_WHITESPACE instead of timings.'),
+    )
+
+    def handle(self, *names, **options):
+        if options['quick']:
+            cases = benchmarks.build_cases(benchmarks.QUICK_SIZES, benchmarks.QUICK_ROWS,
+                benchmarks.QUICK_OPTIONS)
+        else:
+            cases = benchmarks.build_cases()
+        if options['whitespace']:
+            return self.show_whitespace(cases, names)
+        results = benchmarks.run(cases, options['repeat'], names)
+        self.stdout.write('%-28s %12s %12s %8s %8s %10s\n' % ('case', 'render, ms', 'field, us', 'x django',
+            'lookups', 'peak, KB'))
+        for case in cases:
+            if case.name in results:
+                result = results[case.name]
+                relative = benchmarks.relative_time(results, case.name)
+                relative = relative is not None and '%8.2f' % relative or '%8s' % '-'
+                peak = result['peak'] is not None and '%10.1f' % (result['peak'] / 1024.0) or '%10s' % '-'
+                self.stdout.write('%-28s %12.3f %12.2f %s %8d %s\n' % (case.name, result['time'] * 1000,
+                    result['per_field'] * 1000000, relative, result['lookups'], peak))
+        if options['save']:
+            benchmarks.save(results, options['baseline'])
+            self.stdout.write('Baseline saved to %s\n' % options['baseline'])
+        elif os.path.exists(options['baseline']):
+            regressions = benchmarks.compare(results, benchmarks.load(options['baseline']), options['threshold'])
+            if regressions:
+                raise CommandError('Performance regressions:\n%s' % '\n'.join(regressions))
+            self.stdout.write('No regressions against %s\n' % options['baseline'])
+
+    def show_whitespace(self, cases, names):
+        savings = benchmarks.whitespace_savings(cases, names)
+        self.stdout.write('%-28s %12s %12s %8s\n' % ('case', 'bytes/field', 'stripped', 'saved'))
+        for case in cases:
+            if case.name in savings:
+                plain, stripped = savings[case.name]
+                self.stdout.write('%-28s %12.1f %12.1f %7.1f%%\n' % (case.name, plain, stripped,
+                    100 * (plain - stripped) / plain))
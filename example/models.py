@@ -10,6 +10,13 @@ GENDER_CHOICES = (
 MONTHS = ([('%s' % d, d) for d in range(1,12)])
 YEARS = ([('%s' % d, d) for d in range(2012, 2015)])
 
+class Interest(models.Model):
+    name = models.CharField(max_length=64)
+
+    def __unicode__(self):
+        return self.name
+
+
 class Profile(models.Model):
     user = models.ForeignKey(User)
     address = models.CharField(verbose_name='Street Address', max_length=255)
@@ -20,6 +27,7 @@ class Profile(models.Model):
     phone1 = models.CharField(verbose_name='Primary phone', max_length=12)
     phone2 = models.CharField(verbose_name='Alternate phone', max_length=12)
     vip = models.BooleanField(verbose_name='VIP preson', help_text='Set this flag only if you are sure')
+    interests = models.ManyToManyField(Interest, blank=True)
 
 
 class Card(models.Model):
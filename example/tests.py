@@ -5,7 +5,56 @@ unittest). These will both pass when you run "manage.py test".
 Replace these with more appropriate tests for your application.
 """
 
+import decimal
+import gzip
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import types
+from HTMLParser import HTMLParser
+
+from django import forms
+from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.models import User
+from django.core.cache import get_cache
+from django.core.management import call_command
+from django.forms.formsets import formset_factory
+from django.http import HttpRequest, HttpResponse
+from django.template import Template, Context, loader
 from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from django.utils import translation, unittest
+from django.utils.http import parse_http_date
+from django.utils.translation import ugettext_lazy as _
+
+from example import benchmarks
+from zenforms import assets, instrumentation
+from zenforms.base import MultiField, TemplateError
+from zenforms.choices import PagedSelect, index_cache, options_cache, search_choices
+from zenforms.forms import ZenForm, validation_classes
+from zenforms.fragments import fragment_key
+from zenforms.layout import UnusedFields, layout_cache
+from zenforms.loading import registry
+from zenforms.readonly import accessor_cache
+from zenforms.renderers import python_engine_enabled, render_field, stock_templates
+from zenforms.serialization import SCHEMA_VERSION
+from zenforms.streaming import stream_template
+from zenforms.templatetags.zenforms import FieldsetTag, ZenformTag
+from zenforms.views import ChoicesView, FieldValidationView, bundle
+from zenforms.warmup import warmup
+from zenforms.whitespace import strip_text
+from .models import Card, Interest, Profile
+
+try:
+    from zenforms.jinja import jinja_environment
+except ImportError:
+    jinja_environment = None
 
 class SimpleTest(TestCase):
     def test_basic_addition(self):
@@ -21,3 +70,1240 @@ Another way to test that 1 + 1 is equal to 2.
 True
 """}
 
+
+class ProfileForm(forms.Form):
+    first_name = forms.CharField()
+    last_name = forms.CharField(required=False)
+    email = forms.EmailField(help_text='We never spam')
+    phone1 = forms.CharField()
+    phone2 = forms.CharField(required=False)
+    age = forms.IntegerField()
+    vip = forms.BooleanField(required=False)
+
+
+def render(source, **context):
+    return Template('{% load zenforms %}' + source).render(Context(context))
+
+
+class LayoutCacheTest(TestCase):
+    layout = (
+        "{% zenform form options nocsrf=1 %}"
+        "{% fieldset 'first_name' 'last_name' title 'Name' %}"
+        "{% multifield 'phone1' 'phone2' as phones label 'Phones' %}"
+        "{% fieldset phones %}"
+        "{% fieldset unused_fields title 'Rest' %}"
+        "{% endzenform %}"
+    )
+
+    def setUp(self):
+        layout_cache.clear()
+
+    def test_plan_is_reused(self):
+        template = Template('{% load zenforms %}' + self.layout)
+        first = template.render(Context({'form': ProfileForm()}))
+        self.assertEqual(layout_cache.stats()['misses'], 1)
+        second = template.render(Context({'form': ProfileForm()}))
+        self.assertEqual(layout_cache.stats()['hits'], 1)
+        self.assertEqual(len(layout_cache), 1)
+        self.assertEqual(first, second)
+
+    def test_plan_survives_recompiling(self):
+        first = Template('{% load zenforms %}' + self.layout).render(Context({'form': ProfileForm()}))
+        second = Template('{% load zenforms %}' + self.layout).render(Context({'form': ProfileForm()}))
+        self.assertEqual(layout_cache.stats()['misses'], 1)
+        self.assertEqual(layout_cache.stats()['hits'], 1)
+        self.assertEqual(first, second)
+
+    def test_static_fieldsets(self):
+        template = Template('{% load zenforms %}' + self.layout)
+        fieldsets = template.nodelist.get_nodes_by_type(FieldsetTag)
+        self.assertEqual([fieldset.static for fieldset in fieldsets], [True, False, True])
+
+    def test_conditional_fieldsets(self):
+        template = Template(
+            "{% load zenforms %}{% zenform form options nocsrf=1 %}"
+            "{% if short %}{% fieldset 'first_name' 'last_name' 'email' 'phone1' 'age' %}{% endif %}"
+            "{% fieldset unused_fields title 'Rest' %}"
+            "{% endzenform %}"
+        )
+        for short in (True, False, True, False):
+            output = template.render(Context({'form': ProfileForm(), 'short': short}))
+            self.assertEqual(output.count('name="first_name"'), 1)
+            self.assertEqual(output.count('name="vip"'), 1)
+
+    def test_plan_contents(self):
+        template = Template('{% load zenforms %}' + self.layout)
+        template.render(Context({'form': ProfileForm()}))
+        plan = layout_cache.get(layout_cache._data.keys()[0])
+        used = [plan.fieldsets[key].used for key in plan.order]
+        self.assertEqual(used, [
+            ('first_name', 'last_name'),
+            ('phone1', 'phone2'),
+            ('email', 'age', 'vip'),
+        ])
+
+    def test_bound_data_is_not_cached(self):
+        template = Template('{% load zenforms %}' + self.layout)
+        template.render(Context({'form': ProfileForm()}))
+        output = template.render(Context({'form': ProfileForm({'first_name': 'Ivan'})}))
+        self.assertTrue('value="Ivan"' in output)
+
+    def test_cache_is_bounded(self):
+        maxsize = layout_cache.maxsize
+        layout_cache.maxsize = 2
+        try:
+            for i in range(4):
+                render('\n' * i + self.layout, form=ProfileForm())
+            self.assertEqual(len(layout_cache), 2)
+        finally:
+            layout_cache.maxsize = maxsize
+
+
+class WidgetsForm(forms.Form):
+    title = forms.CharField(help_text='Say <something>')
+    agree = forms.BooleanField(help_text='Read it first')
+    sex = forms.ChoiceField(choices=(('M', 'Male'), ('F', 'Female')), widget=forms.RadioSelect)
+    year = forms.ChoiceField(choices=[(str(y), y) for y in range(2012, 2015)])
+    secret = forms.CharField(widget=forms.HiddenInput, required=False)
+    about = forms.CharField(widget=forms.Textarea, required=False)
+    age = forms.IntegerField(label='Age & "years"')
+
+
+class PythonRendererTest(TestCase):
+    sources = [
+        "{% izenform form %}",
+        "{% izenform form options inline=1 submit='Go' %}",
+        "{% izenform form options notag=1 nocsrf=1 %}",
+    ]
+    data = [
+        None,
+        {},
+        {'title': '<b>', 'age': 'many', 'sex': 'M', 'agree': 'on', 'about': '<pre>\n x</pre>'},
+    ]
+
+    def render_with(self, engine, source, form_class, data):
+        form = data is None and form_class() or form_class(data)
+        with override_settings(ZENFORMS_RENDER_ENGINE=engine):
+            return render(source, form=form, csrf_token='token')
+
+    def test_engine_setting(self):
+        self.assertFalse(python_engine_enabled())
+        with override_settings(ZENFORMS_RENDER_ENGINE='python'):
+            self.assertTrue(python_engine_enabled())
+
+    def test_parity(self):
+        for source in self.sources:
+            for form_class in (WidgetsForm, ProfileForm, UserCreationForm):
+                for data in self.data:
+                    self.assertEqual(
+                        self.render_with('template', source, form_class, data),
+                        self.render_with('python', source, form_class, data),
+                    )
+
+    def test_multifield_parity(self):
+        template = loader.get_template('zenforms/field.html')
+        for data in self.data:
+            form = data is None and ProfileForm() or ProfileForm(data)
+            for label in (None, 'Phones'):
+                multifield = MultiField(form, ['phone1', 'email'], label)
+                self.assertEqual(template.render(Context({'field': multifield})), render_field(multifield))
+
+    def test_readonly_parity(self):
+        template = loader.get_template('zenforms/field.html')
+        profile = Profile(address='Lenina <st>', address2='', age=17)
+        for names in ("'address'", "'address' 'age'"):
+            context = Context({'profile': profile})
+            Template('{% load zenforms %}{% readonly profile ' + names + ' as readonly %}').render(context)
+            readonly = context['readonly']
+            self.assertEqual(template.render(Context({'field': readonly})), render_field(readonly))
+
+    def test_fallback_on_overridden_template(self):
+        template_dir = tempfile.mkdtemp()
+        try:
+            os.makedirs(os.path.join(template_dir, 'zenforms', 'fields'))
+            open(os.path.join(template_dir, 'zenforms', 'fields', 'single.html'), 'w').write('{{ field }}')
+            with override_settings(ZENFORMS_RENDER_ENGINE='python', TEMPLATE_DIRS=[template_dir]):
+                self.assertFalse(python_engine_enabled())
+                output = render("{% izenform form %}", form=ProfileForm())
+            self.assertFalse('ctrlHolder' in output)
+        finally:
+            shutil.rmtree(template_dir)
+
+
+class TemplateRegistryTest(TestCase):
+
+    def setUp(self):
+        registry.clear()
+
+    def test_lookups_are_saved(self):
+        template = Template(
+            "{% load zenforms %}{% zenform form options nocsrf=1 %}"
+            "{% fieldset 'first_name' %}{% fieldset unused_fields %}{% submit %}"
+            "{% endzenform %}"
+        )
+        template.render(Context({'form': ProfileForm()}))
+        template.render(Context({'form': ProfileForm()}))
+        stats = registry.stats()
+        self.assertEqual(stats['loads'], 4)
+        self.assertEqual(stats['saved'], 6)
+
+    def test_reload_changed_template(self):
+        template_dir = tempfile.mkdtemp()
+        path = os.path.join(template_dir, 'zenforms', 'submit.html')
+        try:
+            os.makedirs(os.path.dirname(path))
+            open(path, 'w').write('old')
+            with override_settings(DEBUG=True, TEMPLATE_DIRS=[template_dir]):
+                self.assertEqual(render('{% submit %}'), 'old')
+                open(path, 'w').write('new')
+                os.utime(path, (time.time() + 10, time.time() + 10))
+                self.assertEqual(render('{% submit %}'), 'new')
+            with override_settings(DEBUG=False, TEMPLATE_DIRS=[template_dir]):
+                self.assertEqual(render('{% submit %}'), 'new')
+                open(path, 'w').write('newer')
+                os.utime(path, (time.time() + 20, time.time() + 20))
+                self.assertEqual(render('{% submit %}'), 'new')
+        finally:
+            shutil.rmtree(template_dir)
+
+
+class SlugForm(forms.Form):
+    slug = forms.SlugField()
+    code = forms.CharField(widget=forms.TextInput(attrs={'class': 'code'}))
+
+
+class WidgetClassesTest(TestCase):
+
+    def test_subclass_mapping(self):
+        output = render("{% izenform form %}", form=SlugForm())
+        self.assertTrue('class=" textInput required"' in output)
+        self.assertTrue('class="code textInput required"' in output)
+
+    def test_widgets_are_not_modified(self):
+        form = SlugForm()
+        render("{% izenform form %}", form=form)
+        self.assertFalse('class' in form.fields['slug'].widget.attrs)
+        self.assertEqual(form.fields['code'].widget.attrs['class'], 'code')
+        self.assertEqual(SlugForm.base_fields['code'].widget.attrs['class'], 'code')
+
+    def test_repeated_renders(self):
+        form = ProfileForm({'first_name': 'Ivan'})
+        template = Template("{% load zenforms %}{% izenform form %}")
+        first = template.render(Context({'form': form}))
+        self.assertTrue('class=" textInput error required"' in first)
+        for i in range(3):
+            self.assertEqual(template.render(Context({'form': form})), first)
+
+    def test_threads(self):
+        form = ProfileForm({'first_name': 'Ivan'})
+        template = Template("{% load zenforms %}{% izenform form %}")
+        expected = template.render(Context({'form': form}))
+        outputs = []
+
+        def worker():
+            for i in range(20):
+                outputs.append(template.render(Context({'form': form})))
+                outputs.append(template.render(Context({'form': ProfileForm({'first_name': 'Ivan'})})))
+
+        threads = [threading.Thread(target=worker) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(outputs), 320)
+        self.assertEqual(set(outputs), set([expected]))
+
+
+class CardForm(forms.Form):
+    holder = forms.CharField()
+    valid_thru_mo = forms.ChoiceField(choices=[(str(m), m) for m in range(1, 13)])
+    valid_thru_yr = forms.ChoiceField(choices=[(str(y), y) for y in range(2012, 2015)])
+    note = forms.CharField(required=False)
+
+
+class ZenformsetTest(TestCase):
+    layout = (
+        "{% zenformset formset options nocsrf=1 %}"
+        "{% multifield 'valid_thru_mo' 'valid_thru_yr' as valid label 'Valid thru' %}"
+        "{% fieldset 'holder' valid title 'Card' %}"
+        "{% fieldset unused_fields %}"
+        "{% endzenformset %}"
+    )
+
+    def setUp(self):
+        layout_cache.clear()
+
+    def test_rows(self):
+        formset = formset_factory(CardForm, extra=5)()
+        output = render(self.layout, formset=formset)
+        self.assertEqual(output.count('name="form-TOTAL_FORMS"'), 1)
+        self.assertEqual(output.count('<form '), 1)
+        self.assertEqual(output.count('<h3>Card</h3>'), 5)
+        for i in range(5):
+            self.assertTrue('name="form-%s-holder"' % i in output)
+            self.assertTrue('name="form-%s-note"' % i in output)
+        self.assertEqual(layout_cache.stats(), {'hits': 0, 'misses': 1, 'size': 1, 'maxsize': layout_cache.maxsize})
+
+    def test_rows_match_zenform(self):
+        formset = formset_factory(CardForm, extra=2)({
+            'form-TOTAL_FORMS': '2', 'form-INITIAL_FORMS': '0', 'form-MAX_NUM_FORMS': '',
+            'form-0-holder': 'Ivan', 'form-1-note': 'x',
+        })
+        output = render(self.layout, formset=formset)
+        row = (
+            "{% zenform form options notag=1 nocsrf=1 %}"
+            "{% multifield 'valid_thru_mo' 'valid_thru_yr' as valid label 'Valid thru' %}"
+            "{% fieldset 'holder' valid title 'Card' %}"
+            "{% fieldset unused_fields %}"
+            "{% endzenform %}"
+        )
+        for form in formset.forms:
+            self.assertTrue(render(row, form=form).strip() in output)
+        self.assertTrue('error required' in output)
+
+    def test_empty_body(self):
+        formset = formset_factory(CardForm, extra=3)()
+        output = render("{% zenformset formset options notag=1 nocsrf=1 %}{% endzenformset %}", formset=formset)
+        self.assertEqual(output.count('<fieldset'), 3)
+        self.assertEqual(output.count('name="form-INITIAL_FORMS"'), 1)
+
+    def test_non_form_errors(self):
+        class BaseCardFormSet(forms.formsets.BaseFormSet):
+            def clean(self):
+                raise forms.ValidationError('Too many cards')
+        formset = formset_factory(CardForm, formset=BaseCardFormSet)({
+            'form-TOTAL_FORMS': '1', 'form-INITIAL_FORMS': '0', 'form-MAX_NUM_FORMS': '',
+            'form-0-holder': 'Ivan', 'form-0-valid_thru_mo': '1', 'form-0-valid_thru_yr': '2012',
+        })
+        output = render(self.layout, formset=formset)
+        self.assertTrue('<li>Too many cards</li>' in output)
+
+
+class StreamingTest(TestCase):
+
+    def assertStreams(self, source, min_chunks, **context):
+        template = Template('{% load zenforms %}' + source)
+        chunks = stream_template(template, Context(context))
+        self.assertTrue(isinstance(chunks, types.GeneratorType))
+        chunks = list(chunks)
+        self.assertTrue(len(chunks) >= min_chunks)
+        self.assertEqual(u''.join(chunks), template.render(Context(context)))
+        return chunks
+
+    def test_zenform(self):
+        chunks = self.assertStreams(LayoutCacheTest.layout, 5, form=ProfileForm())
+        self.assertTrue(chunks[-1].strip().endswith('</script>'))
+
+    def test_izenform(self):
+        self.assertStreams("<h1>Profile</h1>{% izenform form %}", 4, form=ProfileForm())
+        with override_settings(ZENFORMS_RENDER_ENGINE='python'):
+            self.assertStreams("{% izenform form %}", 10, form=ProfileForm())
+
+    def test_zenformset(self):
+        formset = formset_factory(CardForm, extra=10)
+        self.assertStreams(ZenformsetTest.layout, 13, formset=formset())
+        self.assertStreams("{% zenformset formset %}{% endzenformset %}", 13, formset=formset())
+
+    def test_lazy(self):
+        formset = formset_factory(CardForm, extra=3)()
+        chunks = stream_template(Template('{% load zenforms %}' + ZenformsetTest.layout), Context({'formset': formset}))
+        self.assertTrue('<form ' in chunks.next())
+        self.assertTrue('form-TOTAL_FORMS' in chunks.next())
+        self.assertFalse('form-1-holder' in chunks.next())
+
+
+class ReadonlyTest(TestCase):
+
+    def setUp(self):
+        accessor_cache.clear()
+        self.profile = Profile(address='Lenina st.', sex='F', age=33)
+
+    def test_values(self):
+        output = render("{% readonly profile 'address' 'sex' label 'Info' %}", profile=self.profile)
+        self.assertTrue('<h4 class="readOnlyLabel">Info</h4>' in output)
+        self.assertTrue('<span class="choiceLabel">Street Address</span>' in output)
+        self.assertTrue('<span class="choice">F</span>' in output)
+
+    def test_choice_labels(self):
+        source = "{% readonly profile 'sex' 'age' display choices %}"
+        output = render(source, profile=self.profile)
+        self.assertTrue('<h4 class="readOnlyLabel">Sex</h4>' in output)
+        self.assertTrue('<span class="choice">Female</span>' in output)
+        self.assertTrue('<span class="choice">33</span>' in output)
+        with override_settings(ZENFORMS_READONLY_CHOICES=True):
+            self.assertTrue('Female' in render("{% readonly profile 'sex' %}", profile=self.profile))
+            self.assertFalse('Female' in render("{% readonly profile 'sex' display values %}", profile=self.profile))
+
+    def test_choice_value_types(self):
+        card = Card(valid_thru_mo=5, valid_thru_yr=2013)
+        context = Context({'card': card})
+        Template("{% load zenforms %}{% readonly card 'valid_thru_mo' display choices as valid %}").render(context)
+        self.assertEqual(context['valid'].fields[0]['value'], 5)
+
+    def test_accessor_cache(self):
+        template = Template("{% load zenforms %}{% readonly profile 'address' 'sex' %}")
+        for i in range(3):
+            template.render(Context({'profile': self.profile}))
+        self.assertEqual(accessor_cache.stats()['misses'], 1)
+        self.assertEqual(accessor_cache.stats()['hits'], 2)
+
+    def test_missing_field(self):
+        self.assertRaises(TemplateError, render, "{% readonly profile 'nothing' %}", profile=self.profile)
+
+    def test_many_to_many(self):
+        profile = User.objects.create(username='reader').profile_set.get()
+        profile.interests.add(Interest.objects.create(name='Chess'), Interest.objects.create(name='Go'))
+        output = render("{% readonly profile 'address' 'interests' %}", profile=profile)
+        self.assertTrue('Chess' in output and 'Go' in output)
+        self.assertFalse('Manager' in output)
+        self.assertRaises(TemplateError, render, "{% readonly profile 'card' %}", profile=profile)
+
+
+class RecordingHandler(logging.Handler):
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class UnusedFieldsTest(TestCase):
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.logger = logging.getLogger('zenforms')
+        self.logger.addHandler(self.handler)
+        self.level = self.logger.level
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+        self.logger.setLevel(self.level)
+
+    def test_tracker(self):
+        unused = UnusedFields(['a', 'b', 'c', 'd'])
+        unused.mark_used('c')
+        unused.remove('a')
+        self.assertEqual(list(unused), ['b', 'd'])
+        self.assertEqual(len(unused), 2)
+        self.assertTrue('b' in unused)
+        self.assertFalse('a' in unused)
+        unused.mark_used('a')
+        self.assertEqual(unused.twice, ['a'])
+
+    def test_unused_fields_after_other_arguments(self):
+        output = render(
+            "{% zenform form options nocsrf=1 %}"
+            "{% multifield 'phone1' 'phone2' as phones label 'Phones' %}"
+            "{% fieldset phones unused_fields 'age' %}"
+            "{% endzenform %}",
+            form=ProfileForm(),
+        )
+        self.assertEqual(output.count('name="age"'), 1)
+        self.assertEqual(output.count('name="phone1"'), 1)
+        self.assertTrue(output.index('name="phone1"') < output.index('name="email"') < output.index('name="age"'))
+        self.assertEqual(self.handler.records, [])
+
+    def test_diagnostics(self):
+        render(
+            "{% zenform form options nocsrf=1 %}"
+            "{% fieldset 'first_name' 'email' %}{% fieldset 'first_name' %}"
+            "{% endzenform %}",
+            form=ProfileForm(),
+        )
+        messages = [record.getMessage() for record in self.handler.records]
+        self.assertEqual(messages, [
+            'Form fields rendered more than once: first_name',
+            'Form fields were not rendered: last_name, phone1, phone2, age, vip',
+        ])
+        self.assertEqual(self.handler.records[0].levelno, logging.WARNING)
+
+
+LOCMEM = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'zenforms-tests'}}
+
+
+class FragmentCacheTest(TestCase):
+    source = "{% izenform form options cache=1 %}"
+
+    def setUp(self):
+        self.settings = override_settings(CACHES=LOCMEM)
+        self.settings.enable()
+        self.cache = get_cache('default')
+        self.cache.clear()
+
+    def tearDown(self):
+        self.cache.clear()
+        self.settings.disable()
+
+    def test_csrf_token(self):
+        first = render(self.source, form=ProfileForm(), csrf_token='TOKEN1')
+        second = render(self.source, form=ProfileForm(), csrf_token='TOKEN2')
+        self.assertTrue("value='TOKEN1'" in first)
+        self.assertEqual(first.replace('TOKEN1', 'TOKEN2'), second)
+        self.assertEqual(second, render("{% izenform form %}", form=ProfileForm(), csrf_token='TOKEN2'))
+        self.assertFalse('csrfmiddlewaretoken' in render(self.source, form=ProfileForm(), csrf_token='NOTPROVIDED'))
+
+    def test_cache_hit(self):
+        render(self.source, form=ProfileForm(), csrf_token='token')
+        key = fragment_key('izenform', ProfileForm(), {'cache': 1})
+        self.assertEqual(len(self.cache.get(key)), 3)
+        self.cache.set(key, [u'cached ', 0])
+        output = render(self.source, form=ProfileForm(), csrf_token='token')
+        self.assertTrue(output.startswith('cached <div'))
+
+    def test_key(self):
+        key = fragment_key('izenform', ProfileForm(), {'cache': 1})
+        self.assertEqual(key, fragment_key('izenform', ProfileForm(), {'cache': 1}))
+        self.assertNotEqual(key, fragment_key('izenform', ProfileForm(), {'cache': 1, 'inline': 1}))
+        self.assertNotEqual(key, fragment_key('izenform', ProfileForm(initial={'age': 3}), {'cache': 1}))
+        self.assertNotEqual(key, fragment_key('izenform', SlugForm(), {'cache': 1}))
+        form = ProfileForm()
+        del form.fields['vip']
+        self.assertNotEqual(key, fragment_key('izenform', form, {'cache': 1}))
+        translation.activate('ru')
+        try:
+            self.assertNotEqual(key, fragment_key('izenform', ProfileForm(), {'cache': 1}))
+        finally:
+            translation.deactivate()
+
+    def test_bound_forms_are_not_cached(self):
+        render(self.source, form=ProfileForm({'first_name': 'Ivan'}), csrf_token='token')
+        self.assertEqual(self.cache.get(fragment_key('izenform', ProfileForm(), {'cache': 1})), None)
+        output = render(self.source, form=ProfileForm({'first_name': 'Ivan'}), csrf_token='token')
+        self.assertTrue('value="Ivan"' in output)
+
+    def test_block_names(self):
+        source = "{%% zenform form options cache=%s %%}{%% fieldset %s %%}{%% endzenform %%}"
+        self.assertRaises(TemplateError, render, source % ('1', "'email'"), form=ProfileForm())
+        first = render(source % ("'email'", "'email'"), form=ProfileForm(), csrf_token='token')
+        second = render(source % ("'age'", "'age'"), form=ProfileForm(), csrf_token='token')
+        self.assertTrue('name="email"' in first and 'name="email"' not in second)
+
+    def test_zenformset(self):
+        source = ZenformsetTest.layout.replace('nocsrf=1', "cache='cards'")
+        formset = formset_factory(CardForm, extra=2)
+        first = render(source, formset=formset(), csrf_token='TOKEN1')
+        self.assertTrue("value='TOKEN1'" in first)
+        self.assertEqual(first.replace('TOKEN1', 'TOKEN2'), render(source, formset=formset(), csrf_token='TOKEN2'))
+
+
+class AssetsTest(TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.settings = override_settings(ZENFORMS_BUNDLE_ROOT=self.root)
+        self.settings.enable()
+
+    def tearDown(self):
+        self.settings.disable()
+        shutil.rmtree(self.root)
+
+    def test_minify_css(self):
+        css = assets.minify_css("/* c */ .a{} .b , .c { color : red ; }", ".b,.c{color:red}.d{margin:0}")
+        self.assertEqual(css, '.b,.c{color:red}.d{margin:0}')
+        bundle_css = assets.css_bundle('dark')
+        self.assertTrue(len(bundle_css) < len(assets.read('css', 'uni-form.css')) + len(assets.read('css', 'dark.uni-form.css')))
+
+    def test_fallback(self):
+        output = render("{% zenforms_assets theme='blue' validation=1 lang='de' %}")
+        self.assertTrue('/static/zenforms/css/blue.uni-form.css' in output)
+        self.assertTrue('/static/zenforms/js/uni-form-validation.jquery.min.js' in output)
+        self.assertTrue('/static/zenforms/js/localization/de.js' in output)
+
+    def test_bundles(self):
+        call_command('zenforms_assets', verbosity=0)
+        manifest = assets.load_manifest()
+        self.assertEqual(sorted(manifest['css']), sorted(assets.THEMES))
+        self.assertTrue('validation:de' in manifest['js'])
+        output = render("{% zenforms_assets theme='blue' validation=1 lang='de' %}")
+        self.assertEqual(output.count('/static/zenforms/bundles/uniform.'), 2)
+        self.assertTrue(manifest['js']['validation:de'] in output)
+        self.assertTrue(manifest['css']['blue'] in output)
+        # localizations are ignored without validation
+        plain = render("{% zenforms_assets lang='de' %}")
+        self.assertTrue(manifest['js']['plain:'] in plain)
+        self.assertTrue(manifest['css']['default'] in plain)
+        for filename in manifest['css'].values() + manifest['js'].values():
+            path = os.path.join(self.root, filename)
+            self.assertEqual(gzip.open(path + '.gz').read(), open(path, 'rb').read())
+            self.assertEqual(open(path + '.gz', 'rb').read()[4:8], '\0' * 4)  # zero mtime
+
+    def test_view(self):
+        filename = assets.build()['css']['default']
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = bundle(request, filename)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertTrue('max-age=31536000' in response['Cache-Control'])
+        response = bundle(RequestFactory().get('/'), filename)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, open(os.path.join(self.root, filename), 'rb').read())
+
+    def test_expires(self):
+        filename = assets.build()['css']['default']
+        os.utime(os.path.join(self.root, filename), (0, 0))
+        response = bundle(RequestFactory().get('/'), filename)
+        self.assertTrue(parse_http_date(response['Expires']) > time.time() + 364 * 24 * 60 * 60)
+
+
+class CalendarWidget(forms.TextInput):
+    class Media:
+        css = {'all': ('calendar.css',)}
+        js = ('calendar.js',)
+
+
+class EventForm(forms.Form):
+    start = forms.DateField(widget=CalendarWidget)
+    end = forms.DateField(widget=CalendarWidget)
+
+
+class MediaCollectorTest(TestCase):
+    source = ("{% izenform first options defer=1 %}{% izenform second options defer=1 %}"
+        "{% zenformset formset options defer=1 notag=1 %}{% endzenformset %}{% zenforms_footer %}")
+
+    def test_footer(self):
+        output = render(self.source, first=EventForm(), second=EventForm(prefix='second'),
+            formset=formset_factory(CardForm)())
+        self.assertEqual(output.count('calendar.js'), 1)
+        self.assertEqual(output.count('calendar.css'), 1)
+        self.assertEqual(output.count('.uniform()'), 1)
+        self.assertTrue(output.index('calendar.js') > output.rindex('</form>'))
+        self.assertTrue('jQuery(function ($)' in output)
+
+    def test_not_deferred(self):
+        output = render("{% izenform first %}{% izenform second %}{% zenforms_footer %}",
+            first=EventForm(), second=EventForm())
+        self.assertEqual(output.count('calendar.js'), 2)
+        self.assertEqual(output.count('.uniform()'), 2)
+        self.assertFalse('jQuery(function ($)' in output)
+
+    def test_setting(self):
+        with override_settings(ZENFORMS_DEFER_MEDIA=True):
+            output = render("{% izenform first %}{% izenform second options defer=0 %}{% zenforms_footer %}",
+                first=EventForm(), second=EventForm())
+        self.assertEqual(output.count('calendar.js'), 2)
+        self.assertEqual(output.count('.uniform()'), 2)
+        self.assertTrue('jQuery(function ($)' in output)
+
+    def test_request_scope(self):
+        request = HttpRequest()
+        render("{% izenform form options defer=1 %}", form=EventForm(), request=request)
+        output = render("{% zenforms_footer %}", request=request)
+        self.assertTrue('calendar.js' in output)
+        self.assertTrue('.uniform()' in output)
+        self.assertEqual(render("{% zenforms_footer %}", request=request).strip(), '')
+
+    def test_fragment_cache(self):
+        with override_settings(CACHES=LOCMEM):
+            get_cache('default').clear()
+            source = "{% izenform form options defer=1 cache=1 %}{% zenforms_footer %}"
+            render(source, form=EventForm())
+            self.assertTrue('calendar.js' in render(source, form=EventForm()))
+            get_cache('default').clear()
+
+
+class BenchmarkTest(TestCase):
+
+    def test_quick_run(self):
+        cases = benchmarks.build_cases(benchmarks.QUICK_SIZES, benchmarks.QUICK_ROWS, benchmarks.QUICK_OPTIONS)
+        results = benchmarks.run(cases, repeat=1, names=['readonly/', 'submit/'])
+        self.assertEqual(sorted(results), ['as_p/10', 'readonly/10', 'submit/10'])
+        self.assertEqual(results['submit/10']['lookups'], 10)
+        self.assertTrue('Fieldset 0' in cases[2].render())
+
+    def test_compare(self):
+        baseline = {'as_p/1': {'time': 1.0, 'lookups': 0}, 'a/1': {'time': 1.0, 'lookups': 3},
+            'b/1': {'time': 1.0, 'lookups': 3}}
+        results = {'as_p/1': {'time': 1.0, 'lookups': 0}, 'a/1': {'time': 1.2, 'lookups': 3},
+            'b/1': {'time': 1.5, 'lookups': 4}, 'c/1': {'time': 9, 'lookups': 9}}
+        regressions = benchmarks.compare(results, baseline, threshold=1.3)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(all(r.startswith('b/1: ') for r in regressions))
+        # slower machine: Django is as much slower as zenforms
+        slower = dict((name, dict(result, time=result['time'] * 2)) for name, result in baseline.items())
+        self.assertEqual(benchmarks.compare(slower, baseline, threshold=1.3), [])
+        self.assertEqual(benchmarks.reference('zenformset_fieldset/10'), 'formset_as_p/10')
+        self.assertEqual(benchmarks.reference('select_izenform/1000'), 'select_as_p/1000')
+
+
+class InstrumentationTest(TestCase):
+    source = ("{% zenform form options notag=1 %}{% multifield 'phone1' 'phone2' as phones %}"
+        "{% fieldset 'first_name' phones title 'Main' %}{% fieldset unused_fields %}{% endzenform %}")
+
+    def setUp(self):
+        self.measurements = []
+        instrumentation.add_sink(self.measurements.append)
+
+    def tearDown(self):
+        instrumentation.remove_sink(self.measurements.append)
+
+    def test_measurements(self):
+        output = render(self.source, form=ProfileForm())
+        tags = [m.tag for m in self.measurements]
+        self.assertEqual(tags, ['multifield', 'fieldset', 'fieldset', 'zenform'])
+        zenform = self.measurements[-1]
+        self.assertEqual(zenform.depth, 0)
+        self.assertEqual(zenform.fields, len(ProfileForm.base_fields))
+        self.assertEqual(zenform.bytes, len(output))
+        self.assertTrue(zenform.templates >= 4)
+        self.assertEqual(self.measurements[1].depth, 1)
+        self.assertEqual(self.measurements[1].fields, 3)
+        self.assertTrue(zenform.duration >= self.measurements[1].duration)
+
+    def test_disabled(self):
+        instrumentation.remove_sink(self.measurements.append)
+        render(self.source, form=ProfileForm())
+        self.assertEqual(self.measurements, [])
+        self.assertEqual(instrumentation._stack(), [])
+
+    def test_aggregator_and_settings(self):
+        aggregator = instrumentation.aggregator
+        aggregator.reset()
+        with override_settings(ZENFORMS_INSTRUMENTATION_SINKS=['zenforms.instrumentation.aggregator']):
+            render("{% izenform form %}{% submit %}", form=ProfileForm())
+            render("{% submit %}")
+        self.assertFalse(aggregator in instrumentation.sinks)
+        stats = aggregator.stats()
+        self.assertEqual(stats['submit']['count'], 2)
+        self.assertEqual(stats['izenform']['fields'], len(ProfileForm.base_fields))
+        aggregator.reset()
+
+    def test_server_timing(self):
+        middleware = instrumentation.ServerTimingMiddleware()
+        try:
+            request = HttpRequest()
+            middleware.process_request(request)
+            render(self.source, form=ProfileForm())
+            response = middleware.process_response(request, HttpResponse())
+        finally:
+            instrumentation.remove_sink(middleware.record)
+        header = response['Server-Timing']
+        self.assertTrue(header.startswith('zenforms;dur='))
+        self.assertTrue('zf-fieldset;dur=' in header)
+        self.assertTrue('desc="fieldset x2"' in header)
+
+
+class ConstraintsForm(forms.Form):
+    name = forms.CharField(min_length=2, max_length=30)
+    email = forms.EmailField(max_length=75, required=False)
+    age = forms.IntegerField(min_value=18, max_value=99)
+    code = forms.RegexField(r'^\d+$', max_length=6)
+    born = forms.DateField()
+    price = forms.DecimalField(min_value=decimal.Decimal('0.5'), max_value=decimal.Decimal('100'))
+    ratio = forms.FloatField(min_value=0, required=False)
+    site = forms.URLField(required=False)
+    amount = forms.DecimalField(min_value=1, localize=True)
+
+
+class ValidationClassesTest(TestCase):
+
+    def test_field_types(self):
+        fields = ConstraintsForm.base_fields
+        self.assertEqual(validation_classes(fields['name']), 'validateMinLength val-2 validateMaxLength val-30')
+        self.assertEqual(validation_classes(fields['email']), 'validateEmail validateMaxLength val-75')
+        self.assertEqual(validation_classes(fields['age']), 'validateInteger validateMin val-18 validateMax val-99')
+        self.assertEqual(validation_classes(fields['code']), 'validateMaxLength val-6')
+        self.assertEqual(validation_classes(fields['born']), '')
+        self.assertEqual(validation_classes(fields['price']), 'validateNumber validateMax val-100')
+        self.assertEqual(validation_classes(fields['ratio']), 'validateNumber validateMin val-0')
+        self.assertEqual(validation_classes(fields['site']), '')
+        self.assertEqual(validation_classes(fields['amount']), '')
+        self.assertEqual(validation_classes(forms.IntegerField(max_value=5, localize=True)), '')
+        self.assertEqual(validation_classes(forms.IntegerField(max_value=5)), 'validateInteger validateMax val-5')
+        self.assertEqual(validation_classes(forms.BooleanField()), '')
+
+    def test_render(self):
+        output = render("{% izenform form %}", form=ConstraintsForm())
+        self.assertTrue('class=" textInput required validateInteger validateMin val-18 validateMax val-99"' in output)
+        self.assertTrue('class=" textInput validateEmail validateMaxLength val-75"' in output)
+        self.assertTrue('<form class="uniForm preventSubmit"' in render("{% izenform form options prevent_submit=1 %}",
+            form=ConstraintsForm()))
+        with override_settings(ZENFORMS_VALIDATION_CLASSES=False):
+            output = render("{% izenform form %}", form=ConstraintsForm())
+        self.assertFalse('validate' in output)
+
+
+class SignupForm(forms.Form):
+    username = forms.CharField(max_length=10)
+    password1 = forms.CharField()
+    password2 = forms.CharField()
+    first_name = forms.CharField(required=False)
+    last_name = forms.CharField(required=False)
+
+    def clean_password2(self):
+        if self.cleaned_data.get('password1') != self.cleaned_data['password2']:
+            raise forms.ValidationError('Passwords do not match')
+        return self.cleaned_data['password2']
+
+    def clean(self):
+        raise AssertionError('form.clean() is not called')
+
+
+class FieldValidationTest(TestCase):
+
+    def validate(self, data, **kwargs):
+        view = FieldValidationView.as_view(form_class=SignupForm,
+            validation_dependencies={'password2': ['password1']}, **kwargs)
+        return view(RequestFactory().post('/', data))
+
+    def test_error_fragment(self):
+        response = self.validate({'zenforms_field': 'username', 'username': 'x' * 11, 'password1': ''})
+        html = response.content
+        self.assertTrue(html.startswith('<div class="ctrlHolder error required">'))
+        self.assertTrue('errorlist' in html)
+        self.assertTrue('value="%s"' % ('x' * 11) in html)
+        self.assertFalse('password1' in html)
+
+    def test_valid_fragment(self):
+        html = self.validate({'zenforms_field': 'username', 'username': 'ivan'}).content
+        self.assertTrue(html.startswith('<div class="ctrlHolder  required">'))
+        self.assertFalse('errorlist' in html)
+
+    def test_dependencies_and_json(self):
+        data = {'zenforms_field': 'password2', 'password1': 'a', 'password2': 'b', 'format': 'json'}
+        payload = json.loads(self.validate(data).content)
+        self.assertEqual(payload, {'valid': False, 'errors': {'password2': ['Passwords do not match']}})
+        data['password2'] = 'a'
+        self.assertEqual(json.loads(self.validate(data).content), {'valid': True, 'errors': {}})
+
+    def test_multifield(self):
+        data = {'zenforms_field': ['first_name', 'last_name'], 'zenforms_label': 'Name', 'first_name': 'Ivan'}
+        html = self.validate(data).content
+        self.assertTrue('<p class="fieldLabel">Name</p>' in html)
+        self.assertTrue('value="Ivan"' in html)
+        self.assertTrue('name="last_name"' in html)
+
+    def test_bad_request(self):
+        self.assertEqual(self.validate({'zenforms_field': 'email'}).status_code, 400)
+        self.assertEqual(self.validate({'username': 'ivan'}).status_code, 400)
+        response = FieldValidationView.as_view(form_class=SignupForm)(RequestFactory().get('/'))
+        self.assertEqual(response.status_code, 405)
+
+    def test_option(self):
+        output = render("{% izenform form options validate_url='/validate/' %}", form=SignupForm())
+        self.assertTrue('<form class="uniForm validateFields"' in output)
+        self.assertTrue('data-validate-url="/validate/"' in output)
+
+
+class ZfieldTest(TestCase):
+
+    def test_tag(self):
+        form = ProfileForm()
+        output = render('{% zfield form.first_name class="wide" data-role=role %}', form=form, role='name')
+        self.assertTrue('class="wide"' in output)
+        self.assertTrue('data-role="name"' in output)
+        self.assertEqual(form.fields['first_name'].widget.attrs, {})
+        self.assertFalse('wide' in unicode(form['first_name']))
+
+    def test_as(self):
+        output = render('{% zenform form options notag=1 %}{% zfield form.email data-x="1" as email %}'
+            '{% fieldset email %}{% endzenform %}', form=ProfileForm())
+        self.assertTrue('data-x="1"' in output)
+        self.assertTrue('class=" textInput required validateEmail"' in output)
+        self.assertEqual(output.count('name="email"'), 1)
+
+    def test_filter(self):
+        form = ProfileForm()
+        output = render('{{ form.age|attrs:"class=big,size=\'3\'" }}', form=form)
+        self.assertTrue('class="big"' in output)
+        self.assertTrue('size="3"' in output)
+        self.assertEqual(form.fields['age'].widget.attrs, {})
+        self.assertFalse('big' in render('{{ form.age }}', form=form))
+
+
+def normalize(html):
+    return re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', html)).strip()
+
+
+@unittest.skipIf(jinja_environment is None, 'Jinja2 is not installed')
+class JinjaParityTest(TestCase):
+    """
+    Jinja2 extension renders the same html as Django tags, up to whitespace.
+    """
+    sources = [
+        "{% izenform form %}",
+        "{% izenform form options inline=1 nocsrf=1 submit='Save' %}",
+        "{% zenform form options action='/save/' %}{% multifield 'phone1' 'phone2' as phones label 'Phones' %}"
+        "{% fieldset 'first_name' phones title 'Main' %}{% fieldset unused_fields title 'Other' %}{% endzenform %}",
+        "{% zenform form options notag=1 %}{% readonly profile 'address' 'sex' label 'Profile' as info %}"
+        "{% fieldset info 'email' %}{% fieldset unused_fields %}{% submit %}{% endzenform %}",
+        "{% readonly profile 'sex' label 'Sex' display choices %}{% submit 'Go' %}",
+    ]
+
+    def assertParity(self, source, **context):
+        jinja = jinja_environment().from_string(source).render(**context)
+        self.assertEqual(normalize(jinja), normalize(render(source, **context)))
+
+    def test_parity(self):
+        profile = Profile(address='Main <st>', sex='F')
+        for source in self.sources:
+            self.assertParity(source, form=ProfileForm(), profile=profile, csrf_token='token')
+            self.assertParity(source, form=ProfileForm({'first_name': '<b>', 'age': 'x'}), profile=profile)
+
+    def test_layout_cache(self):
+        template = jinja_environment().from_string(self.sources[2])
+        first = template.render(form=ProfileForm())
+        self.assertEqual(first, template.render(form=ProfileForm()))
+        self.assertEqual(first.count('name="phone2"'), 1)
+
+    def test_errors(self):
+        env = jinja_environment()
+        self.assertRaises(TemplateError, env.from_string("{% fieldset 'email' %}").render, form=ProfileForm())
+        self.assertRaises(TemplateError, env.from_string(
+            "{% zenform form %}{% fieldset 'missing' %}{% endzenform %}").render, form=ProfileForm())
+
+
+class CountingForm(ProfileForm):
+    lookups = 0
+
+    @property
+    def errors(self):
+        CountingForm.lookups += 1
+        return super(CountingForm, self).errors
+
+
+class RenderSessionTest(TestCase):
+
+    def test_bound_fields(self):
+        zenform = ZenForm(ProfileForm(), ZenformTag.field_mapping)
+        self.assertTrue(zenform['email'] is zenform['email'])
+        self.assertTrue(list(zenform)[0] is zenform['first_name'])
+        multifield = MultiField(zenform, ['phone1', 'phone2'], 'Phones')
+        self.assertTrue(multifield.fields[0] is zenform['phone1'])
+
+    def test_visible_fields(self):
+        form = ProfileForm()
+        form.fields['age'].widget = forms.HiddenInput()
+        visible = render("{% zenform form %}{% for field in form.visible_fields %}{{ field }}{% endfor %}"
+            "{% endzenform %}", form=form)
+        self.assertEqual(visible.count('textInput required'), 3)
+        self.assertFalse('name="age"' in visible)
+        hidden = render("{% zenform form %}{% for field in form.hidden_fields %}{{ field }}{% endfor %}"
+            "{% endzenform %}", form=form)
+        self.assertTrue('class=" textInput required validateInteger"' in hidden)
+
+    def test_errors(self):
+        # one lookup by the render session and one by ``non_field_errors`` of the form prefix
+        sources = [
+            "{% zenform form %}{% multifield 'phone1' 'phone2' as phones label 'Phones' %}"
+            "{% fieldset 'first_name' phones %}{% fieldset unused_fields %}{% endzenform %}",
+            "{% zenform form %}{% fieldset 'first_name' 'last_name' 'email' 'phone1' 'age' %}"
+            "{% fieldset 'phone2' 'vip' %}{% endzenform %}",
+            "{% zenform form %}{% fieldset 'age' %}{% endzenform %}",
+        ]
+        for source in sources:
+            CountingForm.lookups = 0
+            output = render(source, form=CountingForm({'age': 'x'}))
+            self.assertTrue('ctrlHolder error' in output)
+            self.assertEqual(CountingForm.lookups, 2)
+
+
+class ReadonlyListTest(TestCase):
+    loop = ("{% for card in cards %}{% readonly card 'cardholder' 'valid_thru_mo' label 'Card' display choices %}"
+        "{% endfor %}")
+    source = "{% readonly_list cards 'cardholder' 'valid_thru_mo' label 'Card' display choices %}"
+
+    def setUp(self):
+        profile = User.objects.create(username='holder').profile_set.get()
+        for index in range(5):
+            Card.objects.create(profile=profile, cardholder='Holder <%d>' % index,
+                valid_thru_yr=2013, valid_thru_mo=index + 1)
+
+    def test_rows(self):
+        output = render(self.source, cards=Card.objects.all())
+        self.assertEqual(output.count('<div class="ctrlHolder">'), 5)
+        self.assertTrue('Holder &lt;4&gt;' in output)
+        self.assertEqual(output, render(self.loop, cards=Card.objects.all()))
+        with override_settings(ZENFORMS_RENDER_ENGINE='python'):
+            self.assertEqual(output, render(self.source, cards=Card.objects.all()))
+
+    def test_many_to_many(self):
+        profile = Profile.objects.get()
+        profile.interests.add(Interest.objects.create(name='Chess'), Interest.objects.create(name='Go'))
+        self.assertRaises(TemplateError, render, "{% readonly_list profiles 'address' 'interests' %}",
+            profiles=Profile.objects.all())
+        render("{% readonly profile 'interests' %}", profile=profile)
+        self.assertRaises(TemplateError, render, "{% readonly_list profiles 'interests' %}",
+            profiles=Profile.objects.all())
+
+    def test_queries(self):
+        cards = Card.objects.all()
+        self.assertNumQueries(1, render, self.source, cards=cards)
+        self.assertEqual(cards._result_cache, None)
+
+    def test_stream(self):
+        template = Template('{% load zenforms %}' + self.source)
+        with override_settings(ZENFORMS_READONLY_LIST_CHUNK=2):
+            chunks = list(stream_template(template, Context({'cards': Card.objects.all()})))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(u''.join(chunks), template.render(Context({'cards': Card.objects.all()})))
+
+
+COUNTRIES = [(str(i), 'Country <%d>' % i) for i in range(200)] + [('Other', [('x', 'X'), ('5', 'Five')])]
+
+
+class CountryForm(forms.Form):
+    country = forms.ChoiceField(choices=COUNTRIES)
+    visited = forms.MultipleChoiceField(choices=COUNTRIES, required=False)
+    currency = forms.ChoiceField(choices=[('usd', 'USD'), ('eur', 'EUR')])
+
+
+class CachedOptionsTest(TestCase):
+
+    def setUp(self):
+        options_cache.clear()
+
+    def assertSameWidgets(self, form):
+        zenform = ZenForm(form, ZenformTag.field_mapping)
+        for name in form.fields:
+            self.assertEqual(unicode(zenform[name]), form[name].as_widget(attrs=zenform[name].attrs))
+
+    def test_options(self):
+        self.assertSameWidgets(CountryForm())
+        self.assertSameWidgets(CountryForm({'country': '5', 'visited': ['5', '7', 'x']}))
+        self.assertSameWidgets(CountryForm({'country': 'missing'}))
+        self.assertEqual(options_cache.stats()['misses'], 2)
+        self.assertEqual(options_cache.stats()['hits'], 4)
+
+    def test_translation(self):
+        form = CountryForm()
+        form.fields['country'].choices = [(str(i), _('Monday')) for i in range(200)]
+        translation.activate('de')
+        try:
+            self.assertTrue('Montag' in render('{% izenform form %}', form=form))
+        finally:
+            translation.deactivate()
+        translation.activate('en')
+        try:
+            output = render('{% izenform form %}', form=form)
+        finally:
+            translation.deactivate()
+        self.assertTrue('Monday' in output and 'Montag' not in output)
+
+    def test_invalidation(self):
+        form = CountryForm()
+        self.assertSameWidgets(form)
+        form.fields['country'].choices = [(str(i), 'Region %d' % i) for i in range(100)]
+        self.assertSameWidgets(form)
+        self.assertTrue('Region 99' in render('{% izenform form %}', form=form))
+        self.assertEqual(options_cache.stats()['misses'], 3)
+
+
+CITIES = [(str(i), 'City %05d' % i) for i in range(5000)] + [('paris', 'Paris'), ('perm', 'Perm')]
+
+
+class TripForm(forms.Form):
+    city = forms.ChoiceField(choices=CITIES, widget=PagedSelect(url='/choices/'))
+    user = forms.ModelChoiceField(User.objects.all(), required=False, widget=PagedSelect('/choices/', 'username'))
+
+
+class PagedChoicesTest(TestCase):
+
+    def setUp(self):
+        for name in ('anna', 'boris', 'bella'):
+            User.objects.create(username=name)
+
+    def choices(self, **params):
+        response = ChoicesView.as_view(form_class=TripForm, paginate_by=3)(RequestFactory().get('/', params))
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_widget(self):
+        output = render('{% izenform form %}', form=TripForm({'city': 'perm'}))
+        self.assertTrue('City 00001' not in output)
+        self.assertTrue('value="Perm"' in output)
+        self.assertTrue('data-choices-url="/choices/"' in output)
+        self.assertTrue('<input type="hidden" name="city" value="perm" id="id_city_value" />' in output)
+        self.assertTrue('zenforms-choices.js' in output)
+        user = User.objects.get(username='bella')
+        self.assertTrue('value="bella"' in unicode(TripForm(initial={'user': user})['user']))
+
+    def test_static(self):
+        data = self.choices(zenforms_field='city', q='p')
+        self.assertEqual(data['results'], [{'value': 'paris', 'label': 'Paris'}, {'value': 'perm', 'label': 'Perm'}])
+        self.assertFalse(data['more'])
+        data = self.choices(zenforms_field='city', q='city 0', page='2')
+        self.assertEqual([r['label'] for r in data['results']], ['City 00003', 'City 00004', 'City 00005'])
+        self.assertTrue(data['more'])
+        self.assertEqual(search_choices(TripForm.base_fields['city'], 'x'), ([], False))
+
+    def test_index_reused(self):
+        self.choices(zenforms_field='city', q='p')
+        hits, misses = index_cache.stats()['hits'], index_cache.stats()['misses']
+        self.choices(zenforms_field='city', q='pa')
+        self.assertEqual(index_cache.stats()['hits'], hits + 1)
+        self.assertEqual(index_cache.stats()['misses'], misses)
+
+    def test_queryset(self):
+        data = self.choices(zenforms_field='user', q='B')
+        self.assertEqual([r['label'] for r in data['results']], ['bella', 'boris'])
+        self.assertEqual(len(self.choices(zenforms_field='user')['results']), 3)
+
+    def test_validation(self):
+        self.assertTrue(TripForm({'city': 'paris'}).is_valid())
+        self.assertFalse(TripForm({'city': 'london'}).is_valid())
+        self.assertFalse(TripForm({'city': 'paris', 'user': '999'}).is_valid())
+
+    def test_bad_request(self):
+        view = ChoicesView.as_view(form_class=TripForm)
+        self.assertEqual(view(RequestFactory().get('/', {'zenforms_field': 'missing'})).status_code, 400)
+        self.assertEqual(view(RequestFactory().get('/', {'zenforms_field': 'city', 'page': 'x'})).status_code, 400)
+        self.assertEqual(view(RequestFactory().get('/')).status_code, 400)
+
+
+class WarmupTest(TestCase):
+
+    def setUp(self):
+        registry.clear()
+        options_cache.clear()
+
+    def test_warmup(self):
+        with override_settings(ZENFORMS_WARMUP_FORMS=['example.tests.CountryForm']):
+            stats = warmup()
+        self.assertEqual(stats, {'templates': len(stock_templates()), 'forms': 1, 'fields': 3})
+        self.assertEqual(options_cache.stats()['size'], 2)
+        loads = registry.stats()['loads']
+        render('{% izenform form %}{% submit %}', form=CountryForm())
+        self.assertEqual(registry.stats()['loads'], loads)
+        self.assertEqual(options_cache.stats()['misses'], 2)
+
+    def test_command(self):
+        call_command('zenforms_warmup', 'example.tests.ProfileForm', verbosity=0)
+        self.assertEqual(warmup([formset_factory(CountryForm)])['fields'], 3)
+        self.assertEqual(registry.stats()['templates'], len(stock_templates()))
+
+
+class DomParser(HTMLParser):
+    """
+    Collects elements, attributes and text with normalized whitespace.
+    """
+
+    def __init__(self, html):
+        HTMLParser.__init__(self)
+        self.events = []
+        self.feed(html)
+        self.close()
+
+    def handle_starttag(self, tag, attrs):
+        self.events.append(('start', tag, attrs))
+
+    def handle_endtag(self, tag):
+        self.events.append(('end', tag))
+
+    def handle_data(self, data):
+        if data.strip():
+            self.events.append(('text', ' '.join(data.split())))
+
+
+class NoteForm(ProfileForm):
+    note = forms.CharField(widget=forms.Textarea, initial='first line\n\n    indented line')
+
+
+class WhitespaceTest(TestCase):
+
+    def setUp(self):
+        registry.clear()
+
+    def render_both(self, source, **context):
+        plain = render(source, **context)
+        with override_settings(ZENFORMS_STRIP_WHITESPACE=True):
+            stripped = render(source, **context)
+        return plain, stripped
+
+    def test_dom(self):
+        sources = [
+            "{% izenform form %}",
+            "{% zenform form options action='/save/' %}{% multifield 'phone1' 'phone2' as phones label 'Phones' %}"
+            "{% fieldset 'first_name' phones title 'Main' %}{% fieldset unused_fields %}{% endzenform %}",
+            "{% readonly profile 'address' 'sex' label 'Profile' %}{% submit 'Go' %}",
+        ]
+        profile = Profile(address='Main st.', sex='F')
+        for source in sources:
+            for form in (NoteForm(), NoteForm({'first_name': 'x', 'vip': 'on'})):
+                plain, stripped = self.render_both(source, form=form, profile=profile, csrf_token='token')
+                self.assertTrue(len(stripped) < len(plain))
+                self.assertEqual(DomParser(stripped).events, DomParser(plain).events)
+
+    def test_python_engine(self):
+        sources = [
+            "{% izenform form %}",
+            "{% readonly_list profiles 'address' 'sex' label 'Profile' %}",
+        ]
+        User.objects.create(username='stripped').profile_set.update(address='Main st.', sex='F')
+        for source in sources:
+            plain, stripped = self.render_both(source, form=NoteForm(), profiles=Profile.objects.all())
+            with override_settings(ZENFORMS_RENDER_ENGINE='python', ZENFORMS_STRIP_WHITESPACE=True):
+                self.assertEqual(render(source, form=NoteForm(), profiles=Profile.objects.all()), stripped)
+            with override_settings(ZENFORMS_RENDER_ENGINE='python'):
+                self.assertEqual(render(source, form=NoteForm(), profiles=Profile.objects.all()), plain)
+
+    def test_preserved(self):
+        plain, stripped = self.render_both('{% izenform form %}', form=NoteForm())
+        self.assertTrue('first line\n\n    indented line</textarea>' in stripped)
+        self.assertTrue("<script type=\"text/javascript\">\n        $('form.uniForm').uniform();" in stripped)
+        self.assertTrue('class="ctrlHolder  required"' in stripped)
+        self.assertTrue('\n    <' not in stripped.split('<textarea')[0])
+
+    def test_strip_text(self):
+        self.assertEqual(strip_text(u'\n  <p>\n  a  b\n</p>\n  '), (u'<p> a b </p>', None))
+        self.assertEqual(strip_text(u' <pre>\n x'), (u'<pre>\n x', 'pre'))
+        self.assertEqual(strip_text(u' y\n</pre>\n <b>', 'pre'), (u' y\n</pre><b>', None))
+        self.assertEqual(strip_text(u' class="a"'), (u' class="a"', None))
+
+
+class JsonLayoutTest(TestCase):
+    source = ("{% zenform form options format='json' action='/save/' %}"
+        "{% readonly profile 'address' 'sex' label 'Profile' as info %}"
+        "{% multifield 'phone1' 'phone2' as phones label 'Phones' %}"
+        "{% fieldset 'first_name' phones info title 'Main' %}{% fieldset unused_fields %}{% endzenform %}")
+
+    def setUp(self):
+        layout_cache.clear()
+        self.profile = Profile(address='Main <st>', sex='F')
+
+    def test_layout(self):
+        output = render(self.source, form=ProfileForm({'first_name': 'Ann', 'age': 'x'}), profile=self.profile)
+        self.assertTrue('<' not in output)
+        data = json.loads(output)
+        self.assertEqual(data['version'], SCHEMA_VERSION)
+        self.assertEqual(data['form'], {'method': 'post', 'action': '/save/', 'errors': []})
+        main, rest = data['fieldsets']
+        self.assertEqual(main['title'], 'Main')
+        self.assertFalse('title' in rest)
+        first_name, phones, info = main['fields']
+        self.assertEqual(first_name, {'kind': 'field', 'name': 'first_name', 'id': 'id_first_name',
+            'label': 'First name', 'widget': 'TextInput', 'attrs': {'class': 'textInput required'},
+            'value': 'Ann', 'required': True})
+        self.assertEqual([field['name'] for field in phones['fields']], ['phone1', 'phone2'])
+        self.assertEqual(phones['fields'][0]['errors'], ['This field is required.'])
+        self.assertEqual(info['fields'], [{'label': 'Street Address', 'value': 'Main <st>'},
+            {'label': 'Sex', 'value': 'F'}])
+        self.assertEqual([field['name'] for field in rest['fields']], ['last_name', 'email', 'age', 'vip'])
+        self.assertEqual(rest['fields'][1]['help_text'], 'We never spam')
+        self.assertEqual(output, render(self.source, form=ProfileForm({'first_name': 'Ann', 'age': 'x'}),
+            profile=self.profile))
+
+    def test_choices(self):
+        data = json.loads(render("{% izenform form options format='json' %}", form=CountryForm({'country': '5'})))
+        country, visited, currency = data['fieldsets'][0]['fields']
+        self.assertEqual((country['value'], country['choices'], visited['choices']), ('5', 'country', 'country'))
+        self.assertEqual(sorted(data['choices']), ['country', 'currency'])
+        self.assertEqual(data['choices']['country'][-1], ['Other', [['x', 'X'], ['5', 'Five']]])
+        city, user = json.loads(render("{% izenform form options format='json' %}",
+            form=TripForm({'city': 'paris'})))['fieldsets'][0]['fields']
+        self.assertEqual((city['choices_url'], city['value_label']), ('/choices/', 'Paris'))
+
+    def test_size(self):
+        for form in (ProfileForm(), CountryForm(), ProfileForm({'age': 'x'})):
+            html = render('{% izenform form %}', form=form, csrf_token='token')
+            output = render("{% izenform form options format='json' %}", form=form)
+            self.assertTrue(len(output) < len(html) * 0.6, (len(output), len(html)))
+
+    @unittest.skipIf(jinja_environment is None, 'Jinja2 is not installed')
+    def test_jinja(self):
+        for source in (self.source, "{% izenform form options format='json' %}"):
+            form = ProfileForm({'age': 'x'})
+            jinja = jinja_environment().from_string(source).render(form=form, profile=self.profile)
+            self.assertEqual(jinja, render(source, form=form, profile=self.profile))
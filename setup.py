@@ -48,6 +48,7 @@ setup(
     packages=find_packages(exclude=['example', 'example.*']),
 
     install_requires=['django-classy-tags >=0.3,<0.4',],
+    extras_require={'jinja2': ['Jinja2>=2.9']},
     include_package_data=True,
     zip_safe=False,
     long_description=read('README'),
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Bundles of uni-form static files.
+
+``zenforms_assets`` management command builds one minified css bundle per theme
+and one js bundle per validation mode and language. Bundles names contain
+content digest, so they can be served with far-future cache headers, and every
+bundle has pre-gzipped ``.gz`` copy. ``{% zenforms_assets %}`` tag takes bundle
+names from manifest, or links original files if bundles were not built.
+"""
+import hashlib
+import json
+import os
+import re
+import struct
+import zlib
+
+from django.conf import settings
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'zenforms')
+THEMES = ('default', 'blue', 'dark', 'ready')
+LANGUAGES = tuple(sorted(name[:-3] for name in os.listdir(os.path.join(STATIC_DIR, 'js', 'localization'))
+    if name.endswith('.js')))
+MANIFEST = 'manifest.json'
+
+# patterns are compiled with flags, ``re.sub`` takes flags only since Python 2.7
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.S)
+JS_COMMENT = re.compile(r'^\s*/\*.*?\*/', re.S | re.M)
+FIRST_COMMENT = re.compile(r'\s*(/\*.*?\*/)', re.S)
+
+# magic, deflate method, no flags, zero mtime, best compression, unknown OS
+GZIP_HEADER = '\x1f\x8b\x08\x00\x00\x00\x00\x00\x02\xff'
+
+_manifest = {}
+
+
+def bundle_root():
+    default = os.path.join(settings.STATIC_ROOT or '', 'zenforms', 'bundles')
+    return getattr(settings, 'ZENFORMS_BUNDLE_ROOT', default)
+
+
+def bundle_url():
+    default = '%szenforms/bundles/' % (settings.STATIC_URL or '/static/')
+    return getattr(settings, 'ZENFORMS_BUNDLE_URL', default)
+
+
+def read(*path):
+    return open(os.path.join(STATIC_DIR, *path)).read().decode('utf-8')
+
+
+def css_rules(source):
+    """
+    Yields ``(selector, declarations)`` pairs with normalized whitespace.
+    """
+    source = CSS_COMMENT.sub('', source)
+    for selector, body in re.findall(r'([^{}]+)\{([^{}]*)\}', source):
+        selector = ','.join(' '.join(part.split()) for part in selector.split(','))
+        declarations = []
+        for declaration in body.split(';'):
+            if ':' in declaration:
+                name, value = declaration.split(':', 1)
+                declarations.append('%s:%s' % (name.strip(), ' '.join(value.split())))
+        yield selector, ';'.join(declarations)
+
+
+def minify_css(*sources):
+    """
+    Joins and minifies stylesheets. Empty rules are dropped, and from identical
+    rules only the last one is kept, it overrides the others anyway.
+    """
+    rules = []
+    for source in sources:
+        rules.extend(rule for rule in css_rules(source) if rule[1])
+    last = dict((rule, index) for index, rule in enumerate(rules))
+    return ''.join('%s{%s}' % rule for index, rule in enumerate(rules) if last[rule] == index)
+
+
+def minify_js(source):
+    """
+    Conservative minification: removes comments, which take whole lines,
+    indentation and blank lines. Line breaks are kept.
+    """
+    source = JS_COMMENT.sub('', source)
+    lines = []
+    for line in source.splitlines():
+        line = line.strip()
+        if line and not line.startswith('//'):
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def license(source):
+    """
+    Returns the first comment of the source, uni-form license must be kept in bundles.
+    """
+    match = FIRST_COMMENT.match(source)
+    return match and match.group(1) + '\n' or ''
+
+
+def css_bundle(theme):
+    if theme not in THEMES:
+        raise ValueError('Unknown uni-form theme %s' % theme)
+    base = read('css', 'uni-form.css')
+    return license(base) + minify_css(base, read('css', '%s.uni-form.css' % theme))
+
+
+def js_sources(validation, lang=None):
+    """
+    Returns names of js files (relative to zenforms static dir). Localizations are
+    used only with validation plugin.
+    """
+    if validation:
+        names = ['js/uni-form-validation.jquery.min.js']
+        if lang and lang in LANGUAGES:
+            names.append('js/localization/%s.js' % lang)
+        return names
+    return ['js/uni-form.jquery.min.js']
+
+
+def js_bundle(validation, lang=None):
+    bits = []
+    for name in js_sources(validation, lang):
+        source = read(*name.split('/'))
+        if not name.endswith('.min.js'):
+            source = minify_js(source)
+        bits.append(source.strip().rstrip(';'))
+    return ';\n'.join(bits) + ';\n'
+
+
+def write_bundle(root, name, extension, content):
+    content = content.encode('utf-8')
+    filename = '%s.%s.%s' % (name, hashlib.md5(content).hexdigest()[:12], extension)
+    path = os.path.join(root, filename)
+    open(path, 'wb').write(content)
+    open(path + '.gz', 'wb').write(gzip_content(content))
+    return filename
+
+
+def gzip_content(content):
+    """
+    Returns gzip file data with zero modification time, so builds of the same
+    content are identical (``GzipFile`` takes ``mtime`` only since Python 2.7).
+    """
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    data = compressor.compress(content) + compressor.flush()
+    return GZIP_HEADER + data + struct.pack('<II', zlib.crc32(content) & 0xffffffff, len(content) & 0xffffffff)
+
+
+def js_key(validation, lang=None):
+    if validation:
+        return 'validation:%s' % (lang in LANGUAGES and lang or '')
+    return 'plain:'
+
+
+def build(root=None):
+    """
+    Writes all bundles and manifest to ``root``. Returns manifest.
+    """
+    root = root or bundle_root()
+    if not os.path.isdir(root):
+        os.makedirs(root)
+    manifest = {'css': {}, 'js': {}}
+    for theme in THEMES:
+        manifest['css'][theme] = write_bundle(root, 'uniform.%s' % theme, 'css', css_bundle(theme))
+    manifest['js'][js_key(False)] = write_bundle(root, 'uniform', 'js', js_bundle(False))
+    for lang in ('',) + LANGUAGES:
+        name = '.'.join(filter(None, ['uniform.validation', lang]))
+        manifest['js'][js_key(True, lang)] = write_bundle(root, name, 'js', js_bundle(True, lang))
+    open(os.path.join(root, MANIFEST), 'w').write(json.dumps(manifest, indent=2, sort_keys=True))
+    _manifest.clear()
+    return manifest
+
+
+def load_manifest():
+    root = bundle_root()
+    if root not in _manifest:
+        try:
+            _manifest[root] = json.loads(open(os.path.join(root, MANIFEST)).read())
+        except (IOError, ValueError):
+            _manifest[root] = None
+    return _manifest[root]
+
+
+def asset_urls(theme='default', lang=None, validation=False):
+    """
+    Returns lists of css and js urls for ``{% zenforms_assets %}`` tag.
+    """
+    manifest = load_manifest()
+    key = js_key(validation, lang)
+    if manifest and theme in manifest['css'] and key in manifest['js']:
+        return [bundle_url() + manifest['css'][theme]], [bundle_url() + manifest['js'][key]]
+    static_url = '%szenforms/' % (settings.STATIC_URL or '/static/')
+    css = [static_url + 'css/uni-form.css', static_url + 'css/%s.uni-form.css' % theme]
+    return css, [static_url + name for name in js_sources(validation, lang)]
+
+
+def _setting_changed(sender, setting, **kwargs):
+    if setting.startswith('STATIC') or setting.startswith('ZENFORMS_BUNDLE'):
+        _manifest.clear()
+
+try:
+    from django.test.signals import setting_changed
+except ImportError:  # Django < 1.4
+    pass
+else:
+    setting_changed.connect(_setting_changed)
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+
+class TemplateError(Exception):
+    pass
+
+
+class MultiField(object):
+    """
+    Inner object for ``MultifieldTag`` class rendering. You probably don't need to know about this class
+    """
+    multifield = True  # For easier template composing
+
+    def __init__(self, form, fields, label):
+        self.form = form
+        self.field_names = fields
+        self.label = label
+        self.fields = []
+        for field_name in self.field_names:
+            try:
+                self.fields.append(self.form[field_name])
+            except KeyError:
+                raise TemplateError('form does not contain field %s' % field_name)
+
+class ReadonlyField(object):
+    """
+    Inner object used for object representing in ``ReadonlyTag``.
+    You probably don't need to know about this class too.
+    """
+    readonly = True  # For easier template composing
+
+    def __init__(self, label, help_text, meta=None, value=None, fields=None):
+        self.label = label
+        self.help_text = help_text
+        self.meta = meta
+        self.value = value
+        self.fields = fields
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Cached ``<option>`` lists of select widgets and paged choices.
+
+Options of selects with large static choices are rendered once per choices
+object and widget class. Every render copies cached html and inserts
+``selected`` attribute for selected values only. Choices are static, when
+they are list or tuple, so options of ``ModelChoiceField`` querysets are
+rendered as usual. Cache entry is bound to the choices object and the active
+language: assigning new choices to the field invalidates it, lists changed in
+place are not noticed.
+
+``PagedSelect`` widget doesn't render options at all: it renders label of the
+current value, and choices are loaded page by page from ``ChoicesView`` as
+user types. Static choices are searched with ``ChoicesIndex``, which is built
+when choices are assigned to the widget, i.e. when form class is defined.
+"""
+import copy
+from bisect import bisect_left
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.forms.models import ModelChoiceIterator
+from django.forms.util import flatatt
+from django.forms.widgets import Select
+from django.utils import translation
+from django.utils.encoding import force_unicode
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from zenforms.utils import LRUCache
+
+SELECTED = u' selected="selected"'
+
+options_cache = LRUCache(getattr(settings, 'ZENFORMS_OPTIONS_CACHE_SIZE', 64))
+index_cache = LRUCache(getattr(settings, 'ZENFORMS_CHOICES_INDEX_SIZE', 64))
+
+
+def _stock(widget_class, name):
+    return getattr(widget_class, name).__func__ is getattr(Select, name).__func__
+
+
+class RenderedOptions(object):
+    """
+    Html of options without selection and positions of ``selected`` attribute
+    of every value.
+    """
+
+    def __init__(self, widget):
+        # reference keeps choices alive, so their id is not reused
+        self.choices = widget.choices
+        self.positions = {}
+        output = []
+        length = 0
+        for option_value, option_label in widget.choices:
+            if isinstance(option_label, (list, tuple)):
+                options = option_label
+                bit = u'<optgroup label="%s">' % escape(force_unicode(option_value))
+                output.append(bit)
+                length += len(bit) + 1
+            else:
+                options = [(option_value, option_label)]
+            for value, label in options:
+                value = force_unicode(value)
+                self.positions.setdefault(value, []).append(length + len(u'<option value="%s"' % escape(value)))
+                bit = widget.render_option(set(), value, label)
+                output.append(bit)
+                length += len(bit) + 1
+            if options is option_label:
+                output.append(u'</optgroup>')
+                length += len(u'</optgroup>') + 1
+        self.html = u'\n'.join(output)
+
+    def render(self, selected_choices, multiple=False):
+        offsets = []
+        for value in set(force_unicode(v) for v in selected_choices):
+            positions = self.positions.get(value)
+            if positions:
+                offsets.extend(multiple and positions or positions[:1])
+        if not offsets:
+            return self.html
+        offsets.sort()
+        bits = []
+        last = 0
+        for offset in offsets:
+            bits.append(self.html[last:offset])
+            bits.append(SELECTED)
+            last = offset
+        bits.append(self.html[last:])
+        return u''.join(bits)
+
+
+def options_cached(widget):
+    """
+    Tells if options of the widget are rendered from cache: widget is a select
+    with stock options rendering and at least ``ZENFORMS_CACHED_OPTIONS_MIN``
+    static choices.
+    """
+    minimum = getattr(settings, 'ZENFORMS_CACHED_OPTIONS_MIN', 100)
+    return (minimum is not None and isinstance(widget, Select)
+        and isinstance(widget.choices, (list, tuple)) and len(widget.choices) >= minimum
+        and _stock(type(widget), 'render_options') and _stock(type(widget), 'render_option'))
+
+
+def render_options(widget, choices, selected_choices):
+    if choices:
+        return widget.render_options(choices, selected_choices)
+    # labels may be translated, so options are cached per language
+    key = (type(widget), id(widget.choices), translation.get_language())
+    options = options_cache.get(key)
+    if options is None or options.choices is not widget.choices:
+        options = RenderedOptions(widget)
+        options_cache.set(key, options)
+    return options.render(selected_choices, widget.allow_multiple_selected)
+
+
+def with_cached_options(widget):
+    """
+    Returns copy of the widget, which takes its options from cache.
+    """
+    widget_copy = copy.copy(widget)
+    widget_copy.render_options = lambda choices, selected_choices: render_options(
+        widget, choices, selected_choices)
+    return widget_copy
+
+
+def flat_choices(choices):
+    for value, label in choices:
+        if isinstance(label, (list, tuple)):
+            for choice in label:
+                yield choice
+        else:
+            yield value, label
+
+
+class ChoicesIndex(object):
+    """
+    Labels of static choices and sorted lowercased labels for prefix search.
+    Choices with empty value (``'---------'``) are not searched.
+    """
+
+    def __init__(self, choices):
+        self.choices = choices
+        self.labels = {}
+        self.items = []
+        for value, label in flat_choices(choices):
+            value, label = force_unicode(value), force_unicode(label)
+            self.labels.setdefault(value, label)
+            if value:
+                self.items.append((value, label))
+        order = sorted((label.lower(), position) for position, (value, label) in enumerate(self.items))
+        self.keys = [key for key, position in order]
+        self.positions = [position for key, position in order]
+
+    def search(self, prefix, offset, limit):
+        if not prefix:
+            return self.items[offset:offset + limit]
+        prefix = prefix.lower()
+        results = []
+        start = bisect_left(self.keys, prefix) + offset
+        for index in xrange(start, min(start + limit, len(self.keys))):
+            if not self.keys[index].startswith(prefix):
+                break
+            results.append(self.items[self.positions[index]])
+        return results
+
+
+def get_index(choices):
+    """
+    Returns index of static choices. Labels may be translated, so there is
+    an index per language.
+    """
+    key = (id(choices), translation.get_language())
+    index = index_cache.get(key)
+    if index is None or index.choices is not choices:
+        index = ChoicesIndex(choices)
+        index_cache.set(key, index)
+    return index
+
+
+def search_choices(field, prefix=u'', page=1, per_page=50):
+    """
+    Returns list of ``(value, label)`` choices of the field, which labels start
+    with ``prefix``, and flag of the next page. Querysets are filtered by
+    ``search_field`` of ``PagedSelect`` widget, without it only paged.
+    """
+    offset = (page - 1) * per_page
+    queryset = getattr(field, 'queryset', None)
+    if queryset is None:
+        # fields of form instances are deep copies with own choices lists,
+        # widget choices are shared with the form class and indexed there
+        choices = getattr(field.widget, 'choices', None)
+        if choices is None:
+            choices = field.choices
+        results = get_index(choices).search(prefix, offset, per_page + 1)
+    else:
+        search_field = getattr(field.widget, 'search_field', None)
+        if search_field:
+            queryset = queryset.order_by(search_field)
+            if prefix:
+                queryset = queryset.filter(**{'%s__istartswith' % search_field: prefix})
+        results = [(force_unicode(field.prepare_value(obj)), force_unicode(field.label_from_instance(obj)))
+            for obj in queryset[offset:offset + per_page + 1]]
+    return results[:per_page], len(results) > per_page
+
+
+class PagedSelect(forms.TextInput):
+    """
+    Select of huge choices, which renders only the current value: text input
+    with its label and hidden input with the value. Choices are loaded from
+    ``url`` of ``ChoicesView`` by ``zenforms-choices.js``. Querysets are
+    searched by ``search_field``::
+
+        country = forms.ChoiceField(choices=COUNTRIES, widget=PagedSelect(url='/choices/'))
+        city = forms.ModelChoiceField(City.objects.all(), widget=PagedSelect('/choices/', 'name'))
+    """
+
+    class Media:
+        js = ('zenforms/js/zenforms-choices.js',)
+
+    def __init__(self, url=None, search_field=None, attrs=None, choices=()):
+        super(PagedSelect, self).__init__(attrs)
+        self.url = url
+        self.search_field = search_field
+        self.choices = choices
+
+    def _get_choices(self):
+        return self._choices
+
+    def _set_choices(self, choices):
+        if not isinstance(choices, ModelChoiceIterator):
+            choices = list(choices)
+            get_index(choices)
+        self._choices = choices
+
+    choices = property(_get_choices, _set_choices)
+
+    def label(self, value):
+        if value in (None, ''):
+            return u''
+        if isinstance(self.choices, ModelChoiceIterator):
+            field = self.choices.field
+            try:
+                obj = self.choices.queryset.get(**{field.to_field_name or 'pk': value})
+            except (ObjectDoesNotExist, ValidationError, ValueError, TypeError):
+                return u''
+            return field.label_from_instance(obj)
+        return get_index(self.choices).labels.get(force_unicode(value), u'')
+
+    def render(self, name, value, attrs=None):
+        final_attrs = self.build_attrs(attrs, type=self.input_type, autocomplete='off')
+        final_attrs['class'] = (u'%s textInput pagedSelect' % final_attrs.get('class', u'')).strip()
+        if self.url:
+            final_attrs['data-choices-url'] = force_unicode(self.url)
+        label = self.label(value)
+        if label:
+            final_attrs['value'] = force_unicode(label)
+        hidden_attrs = {}
+        if 'id' in final_attrs:
+            hidden_attrs['id'] = u'%s_value' % final_attrs['id']
+        hidden = forms.HiddenInput().render(name, value, hidden_attrs)
+        return mark_safe(u'<input%s />%s' % (flatatt(final_attrs), hidden))
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+import inspect
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.forms.forms import BoundField
+from django.forms.util import ErrorDict
+
+from zenforms.choices import options_cached, with_cached_options
+from zenforms.utils import LRUCache
+
+_css_classes = {}
+_validation_classes = {}
+_attrs_specs = LRUCache(256)
+
+# rules of uni-form validation plugin (uni-form-validation.jquery.js);
+# its ``validateUrl`` requires scheme, Django's ``URLField`` adds ``http://``
+VALIDATORS = {
+    forms.EmailField: 'validateEmail',
+    forms.IntegerField: 'validateInteger',
+    forms.FloatField: 'validateNumber',
+    forms.DecimalField: 'validateNumber',
+}
+NUMBERS = ('validateInteger', 'validateNumber')
+LIMITS = ('min_length', 'max_length', 'min_value', 'max_value')
+
+
+def css_class_for(field_class, mapping):
+    """
+    Returns css class for form field class, looking for the nearest class
+    in field class MRO, which is present in ``mapping``. Result is cached.
+    """
+    # mappings are class attributes of tags, so they live as long as process
+    key = (field_class, id(mapping))
+    try:
+        return _css_classes[key]
+    except KeyError:
+        css_class = ''
+        for klass in inspect.getmro(field_class):
+            if klass in mapping:
+                css_class = mapping[klass]
+                break
+        _css_classes[key] = css_class
+        return css_class
+
+
+def _integer(value):
+    # plugin reads limits from ``val-N`` classes with ``parseInt``
+    if value is not None and int(value) == value:
+        return int(value)
+
+
+def validation_classes(field):
+    """
+    Returns classes of uni-form validation plugin rules for form field:
+    type of value, length and value limits. Rules, which the plugin can't
+    check the same way as Django does (regexes, dates, urls, numbers of
+    localized fields), are not added. Result is cached by field class,
+    ``localize`` flag and limits.
+    """
+    key = (type(field), getattr(field, 'localize', False)) + tuple(getattr(field, name, None) for name in LIMITS)
+    try:
+        return _validation_classes[key]
+    except KeyError:
+        classes = _validation_classes[key] = _validation_classes_for(field)
+        return classes
+    except TypeError:  # unhashable limits
+        return _validation_classes_for(field)
+
+
+def _validation_classes_for(field):
+    classes = []
+    validator = css_class_for(type(field), VALIDATORS)
+    if validator in NUMBERS and getattr(field, 'localize', False):
+        # localized input has locale separators, plugin knows only ``1234.5``
+        validator = ''
+    if validator:
+        classes.append(validator)
+    if getattr(field, 'min_length', None):
+        classes.append('validateMinLength val-%d' % field.min_length)
+    if getattr(field, 'max_length', None):
+        classes.append('validateMaxLength val-%d' % field.max_length)
+    if validator in NUMBERS:
+        min_value = _integer(getattr(field, 'min_value', None))
+        max_value = _integer(getattr(field, 'max_value', None))
+        if min_value is not None:
+            classes.append('validateMin val-%d' % min_value)
+        if max_value is not None:
+            classes.append('validateMax val-%d' % max_value)
+    return ' '.join(classes)
+
+
+def clean_fields(form, names):
+    """
+    Validates only given fields of bound form, like ``form.full_clean()`` does
+    for all fields, but without ``form.clean()``. Fields are cleaned in given
+    order, so put fields, which ``clean_<name>`` methods depend on, first.
+    Returns ``form.errors``.
+    """
+    form._errors = ErrorDict()
+    form.cleaned_data = {}
+    for name in names:
+        field = form.fields[name]
+        value = field.widget.value_from_datadict(form.data, form.files, form.add_prefix(name))
+        try:
+            if isinstance(field, forms.FileField):
+                value = field.clean(value, form.initial.get(name, field.initial))
+            else:
+                value = field.clean(value)
+            form.cleaned_data[name] = value
+            if hasattr(form, 'clean_%s' % name):
+                form.cleaned_data[name] = getattr(form, 'clean_%s' % name)()
+        except ValidationError as e:
+            form._errors[name] = form.error_class(e.messages)
+            form.cleaned_data.pop(name, None)
+    return form._errors
+
+
+class ZenBoundField(BoundField):
+    """
+    Bound field, which renders its widget with extra attributes.
+    Widget's own ``attrs`` are never changed. Errors and widget class name
+    are computed once, bound fields live as long as one render.
+    """
+
+    def __init__(self, form, field, name, attrs=None):
+        super(ZenBoundField, self).__init__(form, field, name)
+        self.attrs = attrs or {}
+
+    @property
+    def errors(self):
+        try:
+            return self._cached_errors
+        except AttributeError:
+            self._cached_errors = super(ZenBoundField, self).errors
+            return self._cached_errors
+
+    @property
+    def widget_type(self):
+        try:
+            return self._cached_widget_type
+        except AttributeError:
+            self._cached_widget_type = self.field.widget.__class__.__name__
+            return self._cached_widget_type
+
+    def as_widget(self, widget=None, attrs=None, only_initial=False):
+        if widget is None and self.attrs:
+            extra = self.attrs.copy()
+            extra.update(attrs or {})
+            attrs = extra
+        if widget is None and options_cached(self.field.widget):
+            widget = with_cached_options(self.field.widget)
+        return super(ZenBoundField, self).as_widget(widget, attrs, only_initial)
+
+
+def parse_attrs(spec):
+    """
+    Parses ``attrs`` filter argument: ``"attr1=value1,attr2='value2'"``.
+    Returns tuple of ``(name, value)`` pairs, results are cached.
+    """
+    attrs = _attrs_specs.get(spec)
+    if attrs is None:
+        attrs = []
+        for attribute in spec.split(','):
+            attr_name, attr_value = attribute.split('=')
+            attrs.append((attr_name.strip(), attr_value.strip('"').strip("'")))
+        attrs = tuple(attrs)
+        _attrs_specs.set(spec, attrs)
+    return attrs
+
+
+def with_attrs(field, attrs):
+    """
+    Returns copy of bound field, which renders its widget with ``attrs``
+    added to attributes of the field (zenforms classes of ``ZenBoundField``
+    included). Field and its widget are not changed.
+    """
+    extra = dict(getattr(field, 'attrs', None) or {})
+    extra.update(attrs)
+    return ZenBoundField(field.form, field.field, field.name, extra)
+
+
+class ZenForm(object):
+    """
+    Per-render wrapper of the form, used by ``{% zenform %}`` and ``{% izenform %}``
+    tags. Its bound fields get zenforms css classes, everything else is taken
+    from the original form.
+
+    Wrapper is the render session of the form: bound fields and names of fields
+    with errors are computed once per render and shared by nested tags.
+    """
+
+    def __init__(self, form, field_mapping):
+        self.form = form
+        self.field_mapping = field_mapping
+        self.validation = getattr(settings, 'ZENFORMS_VALIDATION_CLASSES', True)
+        self._bound_fields = {}
+        self._errors = None
+
+    def __getattr__(self, name):
+        return getattr(self.form, name)
+
+    def __getitem__(self, name):
+        try:
+            return self._bound_fields[name]
+        except KeyError:
+            pass
+        try:
+            field = self.form.fields[name]
+        except KeyError:
+            raise KeyError('Key %r not found in Form' % name)
+        bound_field = ZenBoundField(self.form, field, name, {'class': self.css_class(name, field)})
+        bound_field._cached_errors = self.errors.get(name) or self.form.error_class()
+        self._bound_fields[name] = bound_field
+        return bound_field
+
+    def __iter__(self):
+        for name in self.form.fields:
+            yield self[name]
+
+    def __unicode__(self):
+        return self.form.__unicode__()
+
+    def visible_fields(self):
+        return [field for field in self if not field.is_hidden]
+
+    def hidden_fields(self):
+        return [field for field in self if field.is_hidden]
+
+    @property
+    def errors(self):
+        if self._errors is None:
+            self._errors = self.form.errors
+        return self._errors
+
+    def has_errors(self, name):
+        return name in self.errors
+
+    def css_class(self, name, field):
+        css_class = css_class_for(type(field), self.field_mapping)
+        if self.has_errors(name):
+            css_class += ' error'
+        if field.required:
+            css_class += ' required'
+        if self.validation:
+            rules = validation_classes(field)
+            if rules:
+                css_class += ' ' + rules
+        if field.widget.attrs.get('class'):
+            return '%s %s' % (field.widget.attrs['class'], css_class)
+        return ' %s' % css_class
+
+
+class ZenFormSet(object):
+    """
+    Wrapper of the formset, which looks like a form for ``zenform_prefix.html``
+    and ``zenform_postfix.html`` templates.
+    """
+
+    def __init__(self, formset):
+        self.formset = formset
+
+    def __getattr__(self, name):
+        return getattr(self.formset, name)
+
+    def non_field_errors(self):
+        self.formset.errors  # formset is cleaned lazily
+        return self.formset.non_form_errors()
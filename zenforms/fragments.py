@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Fragment cache for unbound forms.
+
+Html of unbound form is the same for every visitor, except a few per-request
+values, like csrf token. Fragment is rendered once with placeholders ("holes")
+instead of such values and stored in Django cache. On cache hit holes are
+rendered for the current request and joined with cached parts.
+"""
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.cache import get_cache
+from django.template import Context
+from django.template.defaulttags import CsrfTokenNode
+from django.utils import translation
+from django.utils.encoding import force_unicode, smart_str
+
+from zenforms.loading import template_path
+from zenforms.renderers import stock_templates
+
+
+class Hole(object):
+    """
+    Per-request value in cached fragment. While fragment is rendered for cache,
+    context ``variable`` holds placeholder. ``render(context)`` returns html,
+    which is put in place of the placeholder html on every request.
+    """
+
+    def __init__(self, variable, render):
+        self.variable = variable
+        self.placeholder = u'zenforms-hole-%s' % variable
+        self.render = render
+
+    def marker(self):
+        return self.render(Context({self.variable: self.placeholder}))
+
+
+def render_csrf_token(context):
+    return CsrfTokenNode().render(context)
+
+holes = [Hole('csrf_token', render_csrf_token)]
+
+_template_version = []
+
+
+def template_version():
+    """
+    Returns digest of paths and modification times of zenforms templates.
+    """
+    if settings.DEBUG or not _template_version:
+        digest = hashlib.md5()
+        for name in stock_templates():
+            path = template_path(name)
+            digest.update(smart_str(path))
+            if path is not None:
+                digest.update(str(os.stat(path).st_mtime))
+        _template_version[:] = [digest.hexdigest()]
+    return _template_version[0]
+
+
+def _initial(form):
+    # forms may change their fields in ``__init__``
+    return tuple(form.fields), sorted(form.initial.items()), form.prefix, form.auto_id
+
+
+def fragment_key(tag_name, form, options):
+    """
+    Cache key of a rendered form. ``form`` is either form or formset.
+    """
+    options = sorted((force_unicode(key), force_unicode(value)) for key, value in options.items())
+    bits = [tag_name, type(form).__module__, type(form).__name__,
+        options, translation.get_language(), template_version()]
+    if hasattr(form, 'management_form'):
+        bits.append([_initial(f) for f in form.forms])
+    else:
+        bits.append(_initial(form))
+    return 'zenforms:%s' % hashlib.md5(smart_str(repr(bits))).hexdigest()
+
+
+def split(output):
+    """
+    Splits rendered fragment by hole markers. Returns list of strings and
+    indexes of holes.
+    """
+    parts = [output]
+    for index, hole in enumerate(holes):
+        marker = hole.marker()
+        if not marker:
+            continue
+        split_parts = []
+        for part in parts:
+            if isinstance(part, basestring) and marker in part:
+                for text in part.split(marker):
+                    split_parts.extend([text, index])
+                split_parts.pop()
+            else:
+                split_parts.append(part)
+        parts = split_parts
+    return parts
+
+
+def stitch(parts, context):
+    values = {}
+    bits = []
+    for part in parts:
+        if isinstance(part, basestring):
+            bits.append(part)
+        else:
+            if part not in values:
+                values[part] = holes[part].render(context)
+            bits.append(values[part])
+    return u''.join(bits)
+
+
+def render_cached(key, context, render, timeout=None):
+    """
+    Returns fragment from cache, renders it with ``render()`` on cache miss.
+    """
+    cache = get_cache(getattr(settings, 'ZENFORMS_CACHE', 'default'))
+    parts = cache.get(key)
+    if parts is None:
+        context.push()
+        try:
+            for hole in holes:
+                context[hole.variable] = hole.placeholder
+            parts = split(render())
+        finally:
+            context.pop()
+        if timeout is None:
+            timeout = getattr(settings, 'ZENFORMS_CACHE_TIMEOUT', 300)
+        cache.set(key, parts, int(timeout))
+    return stitch(parts, context)
+
+
+def _setting_changed(sender, setting, **kwargs):
+    if setting.startswith('TEMPLATE') or setting == 'INSTALLED_APPS':
+        _template_version[:] = []
+
+try:
+    from django.test.signals import setting_changed
+except ImportError:  # Django < 1.4
+    pass
+else:
+    setting_changed.connect(_setting_changed)
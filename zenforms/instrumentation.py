@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation of zenforms tags.
+
+When at least one sink is installed, every render of a zenforms tag produces
+a ``Measurement``: wall time, number of rendered fields, zenforms template
+lookups and size of the output. Measurement is passed to every sink, sink is
+any callable with one argument. Without sinks tags check one list and render
+as usual.
+
+Sinks are installed with ``add_sink`` or listed in settings::
+
+    ZENFORMS_INSTRUMENTATION_SINKS = ['zenforms.instrumentation.log_sink']
+
+``ServerTimingMiddleware`` adds ``Server-Timing`` header with zenforms timings.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.dispatch import Signal
+
+from zenforms.utils import import_path
+
+logger = logging.getLogger('zenforms.instrumentation')
+
+tag_rendered = Signal(providing_args=['measurement'])
+
+sinks = []
+
+_local = threading.local()
+
+
+class Measurement(object):
+    """
+    Measurement of one tag render. ``depth`` is the number of zenforms tags
+    rendering this tag, e.g. 1 for ``{% fieldset %}`` in ``{% zenform %}``.
+    Numbers of nested tags are included in numbers of outer tags.
+    """
+
+    def __init__(self, tag, depth):
+        self.tag = tag
+        self.depth = depth
+        self.fields = 0
+        self.templates = 0
+        self.bytes = 0
+        self.start = time.time()
+        self.duration = None
+
+    def __repr__(self):
+        return '<Measurement %s: %.3fms, %d fields, %d templates, %d bytes>' % (
+            self.tag, (self.duration or 0) * 1000, self.fields, self.templates, self.bytes)
+
+
+def _stack():
+    try:
+        return _local.stack
+    except AttributeError:
+        _local.stack = []
+        return _local.stack
+
+
+def start(tag):
+    stack = _stack()
+    measurement = Measurement(tag, len(stack))
+    stack.append(measurement)
+    return measurement
+
+
+def finish(measurement, output):
+    measurement.duration = time.time() - measurement.start
+    measurement.bytes = len(output)
+    stack = _stack()
+    stack.remove(measurement)
+    for sink in list(sinks):
+        try:
+            sink(measurement)
+        except Exception:
+            logger.exception('Instrumentation sink %r failed', sink)
+
+
+def discard(measurement):
+    _stack().remove(measurement)
+
+
+def note_fields(count):
+    if sinks:
+        for measurement in _stack():
+            measurement.fields += count
+
+
+def note_template():
+    if sinks:
+        for measurement in _stack():
+            measurement.templates += 1
+
+
+class InstrumentedTag(object):
+    """
+    Mixin of zenforms tags, measures ``render``.
+    """
+
+    def render(self, context):
+        if not sinks:
+            return super(InstrumentedTag, self).render(context)
+        measurement = start(self.name)
+        try:
+            output = super(InstrumentedTag, self).render(context)
+        except:
+            discard(measurement)
+            raise
+        finish(measurement, output)
+        return output
+
+
+def add_sink(sink):
+    if sink not in sinks:
+        sinks.append(sink)
+
+
+def remove_sink(sink):
+    if sink in sinks:
+        sinks.remove(sink)
+
+
+def signal_sink(measurement):
+    tag_rendered.send(sender=measurement.tag, measurement=measurement)
+
+
+def log_sink(measurement):
+    logger.debug('%r', measurement)
+
+
+class Aggregator(object):
+    """
+    In-memory sink, collects totals per tag name.
+    """
+
+    def __init__(self):
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, measurement):
+        self._lock.acquire()
+        try:
+            totals = self.totals.setdefault(measurement.tag,
+                {'count': 0, 'time': 0.0, 'fields': 0, 'templates': 0, 'bytes': 0})
+            totals['count'] += 1
+            totals['time'] += measurement.duration
+            totals['fields'] += measurement.fields
+            totals['templates'] += measurement.templates
+            totals['bytes'] += measurement.bytes
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        self._lock.acquire()
+        try:
+            return dict((tag, totals.copy()) for tag, totals in self.totals.items())
+        finally:
+            self._lock.release()
+
+    def reset(self):
+        self._lock.acquire()
+        try:
+            self.totals.clear()
+        finally:
+            self._lock.release()
+
+aggregator = Aggregator()
+
+
+_configured = []
+
+
+def configure():
+    """
+    Installs sinks from ``ZENFORMS_INSTRUMENTATION_SINKS`` setting instead of
+    previously configured ones. Sinks added with ``add_sink`` are kept.
+    """
+    for sink in _configured:
+        remove_sink(sink)
+    _configured[:] = [import_path(path) for path in getattr(settings, 'ZENFORMS_INSTRUMENTATION_SINKS', [])]
+    for sink in _configured:
+        add_sink(sink)
+
+configure()
+
+
+class ServerTimingMiddleware(object):
+    """
+    Adds ``Server-Timing`` header with total time of zenforms tags and time
+    per tag name. Time of nested tags is included into total time once.
+    """
+
+    def __init__(self):
+        add_sink(self.record)
+
+    def record(self, measurement):
+        timings = getattr(_local, 'timings', None)
+        if timings is not None:
+            timings.append(measurement)
+
+    def process_request(self, request):
+        _local.timings = []
+
+    def process_response(self, request, response):
+        timings = getattr(_local, 'timings', None)
+        _local.timings = None
+        if timings:
+            total = sum(m.duration for m in timings if m.depth == 0)
+            metrics = ['zenforms;dur=%.3f;desc="zenforms tags"' % (total * 1000)]
+            tags = []
+            per_tag = {}
+            for measurement in timings:
+                if measurement.tag not in per_tag:
+                    tags.append(measurement.tag)
+                    per_tag[measurement.tag] = [0, 0.0]
+                per_tag[measurement.tag][0] += 1
+                per_tag[measurement.tag][1] += measurement.duration
+            for tag in tags:
+                count, duration = per_tag[tag]
+                metrics.append('zf-%s;dur=%.3f;desc="%s x%d"' % (tag, duration * 1000, tag, count))
+            response['Server-Timing'] = ', '.join(metrics)
+        return response
+
+
+def _setting_changed(sender, setting, **kwargs):
+    if setting == 'ZENFORMS_INSTRUMENTATION_SINKS':
+        configure()
+
+try:
+    from django.test.signals import setting_changed
+except ImportError:  # Django < 1.4
+    pass
+else:
+    setting_changed.connect(_setting_changed)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Jinja2 extension with zenforms tags.
+
+``ZenformsExtension`` adds ``{% zenform %}``, ``{% izenform %}``, ``{% fieldset %}``,
+``{% multifield %}``, ``{% readonly %}`` and ``{% submit %}`` tags with the same
+syntax and layout semantics as Django tags. Html is rendered with Jinja2 ports of
+zenforms templates from ``TEMPLATES_DIR``, put it into environment loader::
+
+    env = Environment(
+        loader=ChoiceLoader([FileSystemLoader('templates'), FileSystemLoader(zenforms.jinja.TEMPLATES_DIR)]),
+        extensions=['zenforms.jinja.ZenformsExtension'],
+        autoescape=True,
+    )
+"""
+from __future__ import absolute_import
+import os
+
+from jinja2 import nodes, Environment, FileSystemLoader, Markup, Undefined
+from jinja2.ext import Extension
+from django.template import Context
+from django.utils.translation import ungettext
+
+from zenforms.base import TemplateError, MultiField, ReadonlyField
+from zenforms.forms import ZenForm
+from zenforms.fragments import render_csrf_token
+from zenforms.layout import UnusedFields, get_layout, resolve_fieldset
+from zenforms.readonly import readonly_context
+from zenforms.renderers import value
+from zenforms.serialization import LayoutDocument
+from zenforms.templatetags.zenforms import DEFAULT_OPTIONS, ZenformTag, widget_type
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jinja2')
+
+STOP_WORDS = ('options', 'title', 'as', 'label', 'display')
+
+
+def django(obj):
+    """
+    Renders object the same way as ``{{ obj }}`` of Django templates does,
+    regardless of environment autoescape setting.
+    """
+    return Markup(value(obj))
+
+
+def jinja_environment(**options):
+    """
+    Returns environment, which loads zenforms templates only. Handy for tests.
+    """
+    options.setdefault('loader', FileSystemLoader(TEMPLATES_DIR))
+    options.setdefault('autoescape', True)
+    options.setdefault('extensions', [ZenformsExtension])
+    return Environment(**options)
+
+
+def _undefined(obj):
+    return obj is None or isinstance(obj, Undefined)
+
+
+class ZenformsExtension(Extension):
+    tags = set(['zenform', 'izenform', 'fieldset', 'multifield', 'readonly', 'submit'])
+    field_mapping = ZenformTag.field_mapping
+
+    def __init__(self, environment):
+        super(ZenformsExtension, self).__init__(environment)
+        environment.filters['django'] = django
+        environment.filters['widget_type'] = widget_type
+
+    # parsing
+
+    def parse(self, parser):
+        token = next(parser.stream)
+        return getattr(self, 'parse_%s' % token.value)(parser, token.lineno)
+
+    def node_key(self, parser, lineno):
+        # tag position in the template is the key of its layout plan
+        counter = getattr(parser, '_zenforms_tags', 0)
+        parser._zenforms_tags = counter + 1
+        return nodes.Const((parser.name, lineno, counter))
+
+    def parse_values(self, parser):
+        values = []
+        while parser.stream.current.type != 'block_end':
+            current = parser.stream.current
+            if current.type == 'name' and current.value in STOP_WORDS:
+                break
+            if current.type == 'string':
+                # adjacent strings are separate arguments, not concatenated
+                next(parser.stream)
+                values.append(nodes.Const(current.value, lineno=current.lineno))
+            else:
+                values.append(parser.parse_expression())
+        return values
+
+    def parse_keyword(self, parser, name, default=None):
+        if parser.stream.skip_if('name:%s' % name):
+            return parser.parse_expression()
+        return default or nodes.Const(None)
+
+    def parse_options(self, parser):
+        items = []
+        if parser.stream.skip_if('name:options'):
+            while parser.stream.current.type == 'name' and parser.stream.look().type == 'assign':
+                key = next(parser.stream)
+                parser.stream.expect('assign')
+                items.append(nodes.Pair(nodes.Const(key.value), parser.parse_expression(), lineno=key.lineno))
+        return nodes.Dict(items)
+
+    def parse_zenform(self, parser, lineno):
+        key = self.node_key(parser, lineno)
+        form = parser.parse_expression()
+        options = self.parse_options(parser)
+        body = parser.parse_statements(['name:endzenform'], drop_needle=True)
+        args = [nodes.Name(name, 'param') for name in ('form', 'unused_fields', 'options', 'zenforms_layout')]
+        call = self.call_method('_zenform', [nodes.ContextReference(), form, options, key])
+        return nodes.CallBlock(call, args, [], body).set_lineno(lineno)
+
+    def parse_izenform(self, parser, lineno):
+        form = parser.parse_expression()
+        options = self.parse_options(parser)
+        call = self.call_method('_izenform', [nodes.ContextReference(), form, options])
+        return nodes.Output([call]).set_lineno(lineno)
+
+    def parse_fieldset(self, parser, lineno):
+        key = self.node_key(parser, lineno)
+        values = self.parse_values(parser)
+        # field names and unused_fields only, plan is looked up without checking arguments
+        static = all(isinstance(value, nodes.Const) and isinstance(value.value, basestring)
+            or isinstance(value, nodes.Name) and value.name == 'unused_fields' for value in values)
+        title = self.parse_keyword(parser, 'title')
+        names = [nodes.Name(name, 'load') for name in ('form', 'unused_fields', 'options', 'zenforms_layout')]
+        call = self.call_method('_fieldset', [nodes.ContextReference(), nodes.List(values), title, key,
+            nodes.Const(static)] + names)
+        return nodes.Output([call]).set_lineno(lineno)
+
+    def parse_multifield(self, parser, lineno):
+        fields = nodes.List(self.parse_values(parser))
+        parser.stream.expect('name:as')
+        target = parser.parse_assign_target()
+        label = self.parse_keyword(parser, 'label')
+        call = self.call_method('_multifield', [fields, label, nodes.Name('form', 'load')])
+        return nodes.Assign(target, call).set_lineno(lineno)
+
+    def parse_readonly(self, parser, lineno):
+        instance = parser.parse_expression()
+        fields = nodes.List(self.parse_values(parser))
+        label = self.parse_keyword(parser, 'label')
+        display = nodes.Const(None)
+        if parser.stream.skip_if('name:display'):
+            display = nodes.Const(parser.stream.expect('name').value == 'choices')
+        if parser.stream.skip_if('name:as'):
+            target = parser.parse_assign_target()
+            call = self.call_method('_readonly_field', [instance, fields, label, display])
+            return nodes.Assign(target, call).set_lineno(lineno)
+        call = self.call_method('_readonly', [nodes.ContextReference(), instance, fields, label, display])
+        return nodes.Output([call]).set_lineno(lineno)
+
+    def parse_submit(self, parser, lineno):
+        value = nodes.Const('Submit')
+        if parser.stream.current.type != 'block_end':
+            value = parser.parse_expression()
+        call = self.call_method('_submit', [nodes.ContextReference(), value, nodes.Name('options', 'load')])
+        return nodes.Output([call]).set_lineno(lineno)
+
+    # rendering
+
+    def render(self, name, context, **variables):
+        data = context.get_all().copy()
+        data.update(variables)
+        return self.environment.get_template(name).render(data)
+
+    def options(self, options, **extra):
+        real_options = DEFAULT_OPTIONS.copy()
+        real_options.update(extra)
+        real_options.update(options)
+        return real_options
+
+    def csrf_input(self, context):
+        token = context.get('csrf_token')
+        return Markup(render_csrf_token(Context({'csrf_token': token})))
+
+    def _zenform(self, context, form, options, key, caller):
+        options = self.options(options)
+        zenform = ZenForm(form, self.field_mapping)
+        unused_fields = UnusedFields(form.fields)
+        layout = get_layout(key, form)
+        if options.get('format') == 'json':
+            # fieldsets find the document in options, caller arguments are fixed
+            document = LayoutDocument(zenform, options)
+            caller(zenform, unused_fields, dict(options, layout_document=document), layout)
+            output = [document.dumps()]
+        else:
+            variables = {'form': zenform, 'options': options,
+                'csrf_input': self.csrf_input(context), 'ungettext': ungettext}
+            output = [self.render('zenforms/zenform_prefix.html', context, **variables),
+                caller(zenform, unused_fields, options, layout),
+                self.render('zenforms/zenform_postfix.html', context, **variables)]
+        unused_fields.report()
+        return Markup(u''.join(output))
+
+    def _izenform(self, context, form, options):
+        options = self.options(options, izenform=True)
+        zenform = ZenForm(form, self.field_mapping)
+        if options.get('format') == 'json':
+            document = LayoutDocument(zenform, options)
+            document.add_fieldset(zenform)
+            return Markup(document.dumps())
+        variables = {'form': zenform, 'fields': zenform, 'options': options,
+            'csrf_input': self.csrf_input(context), 'ungettext': ungettext}
+        return Markup(u''.join([
+            self.render('zenforms/zenform_prefix.html', context, **variables),
+            self.render('zenforms/zenform_inline.html', context, **variables),
+            self.render('zenforms/zenform_postfix.html', context, **variables),
+        ]))
+
+    def _fieldset(self, context, fields, title, key, static, form, unused_fields, options, layout):
+        if _undefined(form) or _undefined(unused_fields):
+            raise TemplateError('fieldset tag must be used in {% zenform %}{% endzenform %} context')
+        fields = resolve_fieldset(key, fields, form, unused_fields, layout, static)
+        if options.get('layout_document') is not None:
+            options['layout_document'].add_fieldset(fields, title)
+            return Markup(u'')
+        return Markup(self.render('zenforms/fieldset.html', context, fields=fields, title=title, options=options))
+
+    def _multifield(self, fields, label, form):
+        if _undefined(form):
+            raise TemplateError('fieldset tag must be used in {% zenform %}{% endzenform %} context')
+        return MultiField(form, fields, label)
+
+    def _readonly_field(self, instance, fields, label, display):
+        return ReadonlyField(**readonly_context(instance, fields, label, display))
+
+    def _readonly(self, context, instance, fields, label, display):
+        readonly = readonly_context(instance, fields, label, display)
+        return Markup(self.render('zenforms/fields/readonly.html', context, readonly=readonly))
+
+    def _submit(self, context, value, options):
+        if _undefined(options):
+            options = context.get('options', {})
+        return Markup(self.render('zenforms/submit.html', context, value=value, options=options))
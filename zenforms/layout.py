@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Layout compiler.
+
+First render of ``{% zenform %}`` node for a form class resolves every
+``{% fieldset %}`` into a ``FieldsetPlan``: ordered entries and consumed
+field names. Plans are collected in ``LayoutPlan`` and kept
+in per-process LRU cache, so next renders only bind fields to the plan.
+
+Nodes are identified by their position in template source, not by node
+objects, so plans are reused when template is compiled again (e.g. without
+cached template loader).
+"""
+import logging
+
+from django.conf import settings
+from django.forms.forms import BoundField
+
+from zenforms.base import TemplateError
+from zenforms.utils import LRUCache
+
+FIELD = 'field'
+MULTIFIELD = 'multifield'
+READONLY = 'readonly'
+UNUSED = 'unused'
+
+TEMPLATES = {
+    FIELD: 'zenforms/fields/single.html',
+    MULTIFIELD: 'zenforms/fields/multi.html',
+    READONLY: 'zenforms/fields/readonly.html',
+}
+
+logger = logging.getLogger('zenforms')
+
+# state of unused fields before any fieldset
+START = object()
+
+layout_cache = LRUCache(getattr(settings, 'ZENFORMS_LAYOUT_CACHE_SIZE', 256))
+
+
+class UnusedFields(object):
+    """
+    Tracks form fields, which were not rendered yet. Keeps form order,
+    marking field as used and membership checks are O(1).
+    Fields, which were rendered more than once, are collected in ``twice``.
+
+    ``state`` stands for the fieldset plans consumed so far: renders, which
+    consumed the same plans in the same order, get the same state object.
+    Fields marked as used outside of plans reset it to ``None``.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.unused = set(self.names)
+        self.twice = []
+        self.state = START
+
+    def mark_used(self, name):
+        if name in self.unused:
+            self.unused.remove(name)
+        else:
+            self.twice.append(name)
+        self.state = None
+    remove = mark_used
+
+    def __contains__(self, name):
+        return name in self.unused
+
+    def __iter__(self):
+        for name in self.names:
+            if name in self.unused:
+                yield name
+
+    def __len__(self):
+        return len(self.unused)
+
+    def __repr__(self):
+        return '<UnusedFields: %s>' % ', '.join(self)
+
+    def report(self):
+        """
+        Logs fields rendered twice, and (with debug level) fields which were never rendered.
+        """
+        if self.twice:
+            logger.warning('Form fields rendered more than once: %s', ', '.join(self.twice))
+        if self.unused and logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Form fields were not rendered: %s', ', '.join(self))
+
+
+def fieldset_signature(fields, unused_fields):
+    """
+    Returns hashable description of ``{% fieldset %}`` arguments.
+    Bound objects (multifields, readonly values) are described by their kind.
+    """
+    signature = []
+    for field in fields:
+        if field is unused_fields:
+            signature.append((UNUSED,))
+        elif isinstance(field, basestring):
+            signature.append(field)
+        elif isinstance(field, BoundField):
+            signature.append((FIELD, field.name))
+        elif getattr(field, 'multifield', False):
+            signature.append((MULTIFIELD, tuple(field.field_names)))
+        elif getattr(field, 'readonly', False):
+            signature.append((READONLY,))
+        else:
+            signature.append((None,))
+    return tuple(signature)
+
+
+class FieldsetPlan(object):
+    """
+    Compiled ``{% fieldset %}``. Each entry is ``(kind, key)``, where key is
+    field name for fields given by name, and argument index for bound fields
+    (e.g. from ``{% zfield %}``), multifields and readonly values. Plans with
+    ``unused_fields`` argument keep names of unused fields they were compiled
+    for and their state, which is checked first.
+    """
+
+    def __init__(self, entries, used, snapshot=None, state=None):
+        self.entries = entries
+        self.used = used
+        self.snapshot = snapshot
+        self.state = state
+        self.transitions = {}
+
+    def applies(self, unused_fields):
+        if self.snapshot is None:
+            return True
+        if self.state is not None and unused_fields.state is self.state:
+            return True
+        if len(unused_fields) != len(self.snapshot):
+            return False
+        for name in self.snapshot:
+            if name not in unused_fields:
+                return False
+        return True
+
+    def consume(self, unused_fields):
+        state = unused_fields.state
+        for name in self.used:
+            unused_fields.mark_used(name)
+        if state is not None:
+            unused_fields.state = self.transitions.setdefault(state, object())
+
+    def bind(self, form, arguments):
+        fields = []
+        for kind, key in self.entries:
+            if kind == FIELD and isinstance(key, basestring):
+                fields.append(form[key])
+            else:
+                fields.append(arguments[key])
+        return fields
+
+
+def compile_fieldset(fields, form, unused_fields):
+    """
+    Compiles ``{% fieldset %}`` arguments. ``unused_fields`` argument is
+    replaced with unused fields, not mentioned in the fieldset explicitly.
+    """
+    explicit = set()
+    snapshot = None
+    state = unused_fields.state
+    for field in fields:
+        if field is unused_fields:
+            snapshot = tuple(unused_fields)
+        elif isinstance(field, basestring):
+            explicit.add(field)
+        elif isinstance(field, BoundField):
+            explicit.add(field.name)
+        elif getattr(field, 'multifield', False):
+            explicit.update(field.field_names)
+
+    entries = []
+    used = []
+    for index, field in enumerate(fields):
+        if field is unused_fields:
+            for name in snapshot:
+                if name not in explicit:
+                    entries.append((FIELD, name))
+                    used.append(name)
+        elif isinstance(field, basestring):
+            if field not in form.fields:
+                raise TemplateError('form does not contain field %s' % field)
+            entries.append((FIELD, field))
+            used.append(field)
+        elif isinstance(field, BoundField):
+            entries.append((FIELD, index))
+            used.append(field.name)
+        elif getattr(field, 'multifield', False):
+            entries.append((MULTIFIELD, index))
+            used.extend(field.field_names)
+        elif getattr(field, 'readonly', False):
+            entries.append((READONLY, index))
+    return FieldsetPlan(entries, tuple(used), snapshot, state)
+
+
+class LayoutPlan(object):
+    """
+    Ordered plan of a ``{% zenform %}`` node: compiled fieldsets.
+    """
+
+    def __init__(self, field_names):
+        self.field_names = field_names
+        self.fieldsets = {}
+        self.order = []
+
+    def get(self, node, signature):
+        return self.fieldsets.get((node, signature))
+
+    def add(self, node, signature, plan):
+        key = (node, signature)
+        if key not in self.fieldsets:
+            self.order.append(key)
+        self.fieldsets[key] = plan
+
+
+def get_layout(node, form):
+    """
+    Returns ``LayoutPlan`` for given ``{% zenform %}`` node key and form.
+    """
+    field_names = tuple(form.fields)
+    key = (node, type(form), field_names)
+    plan = layout_cache.get(key)
+    if plan is None:
+        plan = LayoutPlan(field_names)
+        layout_cache.set(key, plan)
+    return plan
+
+
+def resolve_fieldset(node, fields, form, unused_fields, layout=None, static=False):
+    """
+    Returns bound fields for ``{% fieldset %}`` arguments, marking them as used.
+    Arguments of ``static`` fieldsets are field names and ``unused_fields`` only,
+    so they are not checked, when plan is cached.
+    """
+    signature = None if static else fieldset_signature(fields, unused_fields)
+    plan = layout is not None and layout.get(node, signature) or None
+    if plan is None or not plan.applies(unused_fields):
+        plan = compile_fieldset(fields, form, unused_fields)
+        if layout is not None:
+            layout.add(node, signature, plan)
+    plan.consume(unused_fields)
+    return plan.bind(form, fields)
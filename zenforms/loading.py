@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+Registry of compiled zenforms templates.
+
+Templates are looked up and compiled once per process. With ``DEBUG = True``
+registry checks modification time of template files (and templates they include)
+and reloads changed ones.
+"""
+import copy
+import os
+import threading
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist, loader
+from django.template.loader import find_template_loader
+from django.template.loader_tags import ConstantIncludeNode
+
+from zenforms.instrumentation import note_template
+from zenforms.whitespace import strip_whitespace
+
+
+def _source_loaders():
+    for loader_name in settings.TEMPLATE_LOADERS:
+        template_loader = find_template_loader(loader_name)
+        if template_loader is None:
+            continue
+        # cached loader wraps real ones
+        for template_loader in getattr(template_loader, 'loaders', [template_loader]):
+            yield template_loader
+
+
+def template_path(name):
+    """
+    Returns path of the template, which will be used for ``name``.
+    """
+    for template_loader in _source_loaders():
+        try:
+            source, path = template_loader.load_template_source(name)
+        except (TemplateDoesNotExist, NotImplementedError):
+            continue
+        return path
+    return None
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except (OSError, TypeError):
+        return None
+
+
+def _included(nodelist):
+    """
+    Yields names of templates, included with constant ``{% include %}`` tags.
+    """
+    for node in nodelist.get_nodes_by_type(ConstantIncludeNode):
+        if node.template is not None:
+            yield node.template.name
+            for name in _included(node.template.nodelist):
+                yield name
+
+
+class TemplateRegistry(object):
+
+    def __init__(self):
+        self.templates = {}
+        self.loads = 0
+        self.saved = 0
+        self._lock = threading.Lock()
+
+    def load(self, name):
+        template = loader.get_template(name)
+        if getattr(settings, 'ZENFORMS_STRIP_WHITESPACE', False):
+            # templates of cached loader are shared with the project
+            template = copy.deepcopy(template)
+            strip_whitespace(template)
+        sources = {}
+        if settings.DEBUG:
+            for source_name in [name] + list(_included(template.nodelist)):
+                path = template_path(source_name)
+                sources[path] = _mtime(path)
+        self._lock.acquire()
+        try:
+            self.templates[name] = (template, sources)
+            self.loads += 1
+        finally:
+            self._lock.release()
+        return template
+
+    def changed(self, sources):
+        for path, mtime in sources.iteritems():
+            if _mtime(path) != mtime:
+                return True
+        return False
+
+    def get_template(self, name):
+        note_template()
+        try:
+            template, sources = self.templates[name]
+        except KeyError:
+            return self.load(name)
+        if settings.DEBUG and self.changed(sources):
+            return self.load(name)
+        self.saved += 1
+        return template
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self.templates.clear()
+            self.loads = 0
+            self.saved = 0
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        return {
+            'templates': len(self.templates),
+            'loads': self.loads,
+            'saved': self.saved,
+        }
+
+
+registry = TemplateRegistry()
+get_template = registry.get_template
+
+
+def _setting_changed(sender, setting, **kwargs):
+    if setting.startswith('TEMPLATE') or setting in ('INSTALLED_APPS', 'DEBUG', 'ZENFORMS_STRIP_WHITESPACE'):
+        registry.clear()
+
+try:
+    from django.test.signals import setting_changed
+except ImportError:  # Django < 1.4
+    pass
+else:
+    setting_changed.connect(_setting_changed)
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+
+from zenforms.assets import bundle_root, build
+
+
+class Command(NoArgsCommand):
+    help = 'Builds minified and gzipped bundles of uni-form css and javascript.'
+    option_list = NoArgsCommand.option_list + (
+        make_option('--root', dest='root', default=None,
+            help='Directory for bundles, ZENFORMS_BUNDLE_ROOT by default.'),
+    )
+
+    def handle_noargs(self, root=None, **options):
+        root = root or bundle_root()
+        manifest = build(root)
+        if int(options.get('verbosity', 1)) > 0:
+            for kind in ('css', 'js'):
+                for key, filename in sorted(manifest[kind].items()):
+                    self.stdout.write('%s %s\n' % (key, filename))
+            self.stdout.write('Bundles are written to %s\n' % root)
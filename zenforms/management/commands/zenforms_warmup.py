@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from zenforms.loading import registry
+from zenforms.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = ('Compiles zenforms templates and computes metadata of form classes '
+        '(ZENFORMS_WARMUP_FORMS by default), checking that warm-up works.')
+    args = '[form class path ...]'
+
+    def handle(self, *paths, **options):
+        stats = warmup(paths or None)
+        if int(options.get('verbosity', 1)) > 0:
+            self.stdout.write('%(templates)d templates, %(forms)d forms, %(fields)d fields\n' % stats)
+            self.stdout.write('Template registry: %(templates)d templates, %(loads)d loads\n' % registry.stats())
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Page-level collector of forms media.
+
+With deferred media zenforms tags don't render ``form.media`` and the
+``uniform()`` call next to every form. They register them in the collector
+instead, and ``{% zenforms_footer %}`` renders deduplicated media and one
+initialization script for all forms of the page.
+"""
+from django import forms
+from django.conf import settings
+
+
+class MediaCollector(object):
+
+    def __init__(self):
+        self.media = forms.Media()
+        self.init = False
+
+    def add(self, form, options):
+        # ``Media`` skips already added css and javascript files
+        self.media = self.media + form.media
+        if not options.get('notag'):
+            self.init = True
+
+
+def media_deferred(options):
+    if 'defer' in options:
+        return bool(options['defer'])
+    return getattr(settings, 'ZENFORMS_DEFER_MEDIA', False)
+
+
+def get_collector(context):
+    """
+    Returns collector of the current request. Without request in the context
+    collector lives as long as the context.
+    """
+    request = context.get('request')
+    if request is not None:
+        if not hasattr(request, '_zenforms_media'):
+            request._zenforms_media = MediaCollector()
+        return request._zenforms_media
+    return context.render_context.dicts[0].setdefault('zenforms_media', MediaCollector())
+
+
+def pop_collector(context):
+    """
+    Returns collected media and resets the collector, so media is rendered once.
+    """
+    collector = get_collector(context)
+    request = context.get('request')
+    if request is not None:
+        del request._zenforms_media
+    else:
+        del context.render_context.dicts[0]['zenforms_media']
+    return collector
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+Compiled accessors for ``{% readonly %}`` tag.
+
+Accessor is built once per model and list of field names: it keeps model fields
+metadata and choice labels, so rendering read-only values only reads instance
+attributes. Rows of ``{% readonly_list %}`` are read with the same accessor
+from tuples of selected columns, model instances are not created.
+"""
+from django.conf import settings
+from django.db.models.fields import FieldDoesNotExist
+from django.utils.encoding import force_unicode
+
+from zenforms.base import TemplateError
+from zenforms.utils import LRUCache
+
+accessor_cache = LRUCache(getattr(settings, 'ZENFORMS_READONLY_CACHE_SIZE', 256))
+
+
+class ReadonlyAccessor(object):
+
+    def __init__(self, model, field_names):
+        opts = model._meta
+        self.fields = []
+        self.many_to_many = False
+        for fname in field_names:
+            try:
+                field, model, direct, m2m = opts.get_field_by_name(fname)
+            except FieldDoesNotExist:
+                raise TemplateError('Field %s not exists in a model' % fname)
+            if not direct:
+                raise TemplateError('Field %s is a reverse relation, not a field of a model' % fname)
+            self.fields.append(field)
+            self.many_to_many = self.many_to_many or m2m
+        self.names = [f.name for f in self.fields]
+        self.attnames = [f.attname for f in self.fields]
+        self.choices = []
+        for f in self.fields:
+            if f.choices:
+                # keys are unicode, because choices values not always
+                # have the same type as field values
+                self.choices.append(dict((force_unicode(key), label) for key, label in f.flatchoices))
+            else:
+                self.choices.append(None)
+        self.label = self.fields[0].verbose_name
+        self.help_text = self.fields[0].help_text
+
+    def values(self, instance, display=False):
+        # attribute of many-to-many field is related manager, not a value
+        if self.many_to_many:
+            values = [f.value_from_object(instance) for f in self.fields]
+        else:
+            values = [getattr(instance, attname) for attname in self.attnames]
+        return self.row_values(values, display)
+
+    def row_values(self, values, display=False):
+        if display:
+            for index, labels in enumerate(self.choices):
+                if labels is not None:
+                    value = values[index]
+                    values[index] = labels.get(force_unicode(value), value)
+        return values
+
+    def get_context(self, instance, label=None, display=False):
+        return self.row_context(self.values(instance, display), label)
+
+    def row_context(self, values, label=None):
+        return {
+            'fields': [{'value': value, 'meta': meta} for meta, value in zip(self.fields, values)],
+            'label': label or self.label,
+            'help_text': self.help_text,
+        }
+
+
+def get_accessor(model, field_names, columns=False):
+    """
+    Returns cached accessor. With ``columns`` fields must be columns of the
+    model's table or of its parents' tables, joined one-to-one: selected
+    many-to-many fields would give a row per related object.
+    """
+    key = (model, tuple(field_names))
+    accessor = accessor_cache.get(key)
+    if accessor is None:
+        accessor = ReadonlyAccessor(model, field_names)
+        accessor_cache.set(key, accessor)
+    if columns and accessor.many_to_many:
+        raise TemplateError('Many-to-many fields can not be selected by rows: %s' % ', '.join(field_names))
+    return accessor
+
+
+def readonly_context(instance, field_names, label, display=None):
+    """
+    Returns context of ``{% readonly %}`` tag. ``display`` tells to show
+    labels of choices, ``ZENFORMS_READONLY_CHOICES`` setting by default.
+    """
+    if display is None:
+        display = getattr(settings, 'ZENFORMS_READONLY_CHOICES', False)
+    return get_accessor(type(instance), field_names).get_context(instance, label, display)
+
+
+def iter_readonly_rows(queryset, field_names, label, display=None):
+    """
+    Yields context of ``{% readonly %}`` tag for every row of the queryset.
+    Only listed columns are selected, rows are fetched by chunks with
+    ``iterator()``, so queryset is not cached and memory doesn't grow with
+    number of rows.
+    """
+    if display is None:
+        display = getattr(settings, 'ZENFORMS_READONLY_CHOICES', False)
+    accessor = get_accessor(queryset.model, field_names, columns=True)
+    for row in queryset.values_list(*accessor.names).iterator():
+        yield accessor.row_context(accessor.row_values(list(row), display), label)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Pure-python renderer for stock zenforms templates.
+
+Functions below produce exactly the same markup, as ``zenform_inline.html``,
+``field.html`` and ``fields/*.html`` templates do, but without include chain
+and template filters. Renderer is used only when ``ZENFORMS_RENDER_ENGINE``
+setting is ``'python'`` and none of ``zenforms/*.html`` templates is overridden
+in the project. Its markup is not stripped, so with ``ZENFORMS_STRIP_WHITESPACE``
+stripped templates are rendered instead.
+"""
+import os
+
+from django.conf import settings
+from django.utils.encoding import force_unicode
+from django.utils.formats import localize
+from django.utils.html import escape
+from django.utils.safestring import SafeData, mark_safe
+
+from zenforms.loading import template_path
+
+TEMPLATE_ENGINE = 'template'
+PYTHON_ENGINE = 'python'
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+_stock = {}
+
+
+def stock_templates():
+    """
+    Returns names of templates shipped with zenforms.
+    """
+    names = []
+    root = os.path.join(TEMPLATES_DIR, 'zenforms')
+    for dirpath, dirnames, filenames in os.walk(root):
+        for filename in filenames:
+            if filename.endswith('.html'):
+                path = os.path.join(dirpath, filename)
+                names.append(os.path.relpath(path, TEMPLATES_DIR).replace(os.sep, '/'))
+    return sorted(names)
+
+
+def templates_overridden():
+    """
+    Checks if any of ``zenforms/*.html`` templates is overridden in project.
+    Result is computed once per template settings.
+    """
+    key = (tuple(settings.TEMPLATE_LOADERS), tuple(settings.TEMPLATE_DIRS),
+        tuple(settings.INSTALLED_APPS))
+    if key not in _stock:
+        overridden = False
+        for name in stock_templates():
+            path = template_path(name)
+            if path is None or os.path.abspath(path) != os.path.join(TEMPLATES_DIR, *name.split('/')):
+                overridden = True
+                break
+        _stock[key] = overridden
+    return _stock[key]
+
+
+def python_engine_enabled():
+    engine = getattr(settings, 'ZENFORMS_RENDER_ENGINE', TEMPLATE_ENGINE)
+    if engine != PYTHON_ENGINE or getattr(settings, 'ZENFORMS_STRIP_WHITESPACE', False):
+        return False
+    return not templates_overridden()
+
+
+def value(obj):
+    """
+    Renders object the same way as ``{{ obj }}`` does.
+    """
+    obj = force_unicode(localize(obj))
+    if isinstance(obj, SafeData):
+        return obj
+    return escape(obj)
+
+
+def widget_type(field):
+    return getattr(field, 'widget_type', None) or field.field.widget.__class__.__name__
+
+
+def render_single(field):
+    """
+    ``zenforms/fields/single.html``
+    """
+    if field.field.widget.is_hidden:
+        return u'\n\n    %s\n' % value(field)
+    errors = field.errors
+    bits = [u'\n\n<div class="ctrlHolder ']
+    if errors:
+        bits.append(u'error')
+    bits.append(u' ')
+    if field.field.required:
+        bits.append(u'required')
+    bits.append(u'">\n    ')
+    if errors:
+        bits.append(u'\n        %s\n    ' % value(errors))
+    bits.append(u'\n    ')
+    if widget_type(field) == 'CheckboxInput':
+        bits.append(u'\n        <label for="%s">\n            %s\n            %s\n        </label>\n    ' % (
+            value(field.id_for_label), value(field), value(field.label)))
+    else:
+        bits.append(u'\n        <label for="%s">%s</label>\n        %s\n    ' % (
+            value(field.id_for_label), value(field.label), value(field)))
+    bits.append(u'\n    ')
+    if field.help_text:
+        bits.append(u'\n        <p class="formHint">%s</p>\n    ' % value(field.help_text))
+    bits.append(u'\n    </div>\n')
+    return u''.join(bits)
+
+
+def render_multi(field):
+    """
+    ``zenforms/fields/multi.html``
+    """
+    subfields = field.fields
+    bits = [u'\n<div class="ctrlHolder ']
+    for subfield in subfields:
+        if subfield.errors:
+            bits.append(u'error ')
+    bits.append(u'">\n\n<p class="fieldLabel">')
+    if field.label:
+        bits.append(value(field.label))
+    bits.append(u'</p>\n\n<ul>\n')
+    for subfield in subfields:
+        # template compares ``field|widget_type`` of multifield itself,
+        # which is never a checkbox
+        bits.append(u'\n    <li>\n        \n            <label for="%s">%s</label>\n            %s\n        \n\n\n    </li>\n' % (
+            value(subfield.id_for_label), value(subfield.label), value(subfield)))
+    bits.append(u'\n</ul>\n')
+    for subfield in subfields:
+        bits.append(u'\n    ')
+        if subfield.help_text:
+            bits.append(u'\n    <p class="formHint">%s</p>\n    ' % value(subfield.help_text))
+        bits.append(u'\n    ')
+        if subfield.errors:
+            bits.append(u'\n        %s\n    ' % value(subfield.errors))
+        bits.append(u'\n')
+    bits.append(u'\n</div>')
+    return u''.join(bits)
+
+
+def render_readonly(readonly):
+    """
+    ``zenforms/fields/readonly.html``, ``readonly`` is either ``ReadonlyField``
+    or context dict of ``ReadonlyTag``.
+    """
+    if isinstance(readonly, dict):
+        label, fields, help_text = readonly.get('label'), readonly.get('fields'), readonly.get('help_text')
+    else:
+        label, fields, help_text = readonly.label, readonly.fields, readonly.help_text
+    bits = [u'<div class="ctrlHolder">\n    <h4 class="readOnlyLabel">%s</h4>\n    ' % value(label)]
+    single = len(fields) == 1
+    for field in fields:
+        bits.append(u'\n    <div class="readOnly">\n        <div class="readOnly">\n            ')
+        if single:
+            bits.append(u'\n            ')
+        else:
+            bits.append(u'\n            <span class="choiceLabel">%s</span>\n            ' % value(field['meta'].verbose_name))
+        bits.append(u'\n            <span class="choice">%s</span>\n        </div>\n    </div>\n    ' % value(field['value']))
+    bits.append(u'\n    ')
+    if help_text:
+        bits.append(u'\n        <p class="formHint">%s</p>\n    ' % value(help_text))
+    bits.append(u'\n</div>')
+    return u''.join(bits)
+
+
+def render_field(field):
+    """
+    ``zenforms/field.html``
+    """
+    if getattr(field, 'multifield', False):
+        return u'\n    %s\n\n' % render_multi(field)
+    if getattr(field, 'readonly', False):
+        return u'\n    \n        \n        %s\n        \n    \n\n' % render_readonly(field)
+    return u'\n    \n        %s\n    \n\n' % render_single(field)
+
+
+def iter_inline(fields, options):
+    """
+    ``zenforms/zenform_inline.html`` by chunks
+    """
+    if options.get('inline'):
+        yield u'<fieldset class="inlineLabels">\n'
+    else:
+        yield u'<fieldset >\n'
+    for field in fields:
+        yield u'\n    %s\n' % render_field(field)
+    yield u'\n</fieldset>\n'
+
+
+def render_inline(fields, options):
+    """
+    ``zenforms/zenform_inline.html``
+    """
+    return mark_safe(u''.join(iter_inline(fields, options)))
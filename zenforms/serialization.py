@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+JSON layout of zenforms for client-side rendering.
+
+With ``format='json'`` option ``{% zenform %}`` and ``{% izenform %}`` tags
+render compact JSON instead of html. Fieldsets are resolved with the same
+layout plans as html, so fields, multifields and readonly groups come in the
+same order and the same fieldsets::
+
+    {"version": 1,
+     "form": {"method": "post", "action": ".", "errors": []},
+     "fieldsets": [{"title": "Main", "fields": [
+        {"kind": "field", "name": "country", "id": "id_country", "label": "Country",
+         "widget": "Select", "attrs": {"class": "required"}, "value": "5",
+         "required": true, "choices": "country"},
+        {"kind": "multifield", "label": "Phones", "fields": [...]},
+        {"kind": "readonly", "label": "Profile", "fields": [{"label": "Sex", "value": "F"}]}]}],
+     "choices": {"country": [["1", "Country 1"], ["Europe", [["5", "Five"]]]]}}
+
+Choices are serialized once under the name of the first field, which uses
+them, fields with equal choices refer to the same entry. ``PagedSelect``
+choices are not serialized, the field has ``choices_url`` and ``value_label``
+instead. Empty ``errors``, ``help_text`` and ``attrs`` are omitted.
+``version`` is ``SCHEMA_VERSION`` and changes with incompatible changes of
+the schema.
+"""
+import json
+
+from django.utils.encoding import force_unicode
+from django.utils.formats import localize
+
+from zenforms.choices import PagedSelect
+from zenforms.layout import FIELD, MULTIFIELD, READONLY
+
+SCHEMA_VERSION = 1
+
+# output is safe to put into ``<script>`` element
+ESCAPES = ((u'&', u'\\u0026'), (u'<', u'\\u003c'), (u'>', u'\\u003e'))
+
+
+def json_value(widget, value):
+    if value is None or isinstance(value, (bool, int, long, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [json_value(widget, item) for item in value]
+    if hasattr(widget, '_format_value'):
+        value = widget._format_value(value)
+    return force_unicode(value)
+
+
+def json_choices(choices):
+    output = []
+    for value, label in choices:
+        if isinstance(label, (list, tuple)):
+            output.append([force_unicode(value), json_choices(label)])
+        else:
+            output.append([force_unicode(value), force_unicode(label)])
+    return output
+
+
+class LayoutDocument(object):
+    """
+    JSON document of one form render. ``{% fieldset %}`` tags add their
+    resolved fields with ``add_fieldset``.
+    """
+
+    def __init__(self, form, options):
+        self.form = form
+        self.options = options
+        self.fieldsets = []
+        self.choices = {}
+        self._choices_names = {}
+
+    def add_fieldset(self, fields, title=None):
+        fieldset = {'fields': [self.item(field) for field in fields]}
+        if title:
+            fieldset['title'] = force_unicode(title)
+        self.fieldsets.append(fieldset)
+
+    def item(self, field):
+        if getattr(field, 'multifield', False):
+            return {'kind': MULTIFIELD, 'label': force_unicode(field.label or u''),
+                'fields': [self.field(subfield) for subfield in field.fields]}
+        if getattr(field, 'readonly', False):
+            return self.readonly(field)
+        return self.field(field)
+
+    def field(self, field):
+        widget = field.field.widget
+        attrs = dict(widget.attrs, **getattr(field, 'attrs', {}))
+        attrs['class'] = attrs.get('class', u'').strip()
+        if not attrs['class']:
+            del attrs['class']
+        attrs.setdefault('id', field.auto_id)
+        data = {
+            'kind': FIELD,
+            'name': field.html_name,
+            'label': force_unicode(field.label),
+            'widget': widget.__class__.__name__,
+            'value': json_value(widget, field.value()),
+            'required': field.field.required,
+        }
+        if attrs['id']:
+            data['id'] = attrs['id']
+        del attrs['id']
+        if attrs:
+            data['attrs'] = dict((key, force_unicode(value)) for key, value in attrs.items())
+        if widget.is_hidden:
+            data['hidden'] = True
+        if field.help_text:
+            data['help_text'] = force_unicode(field.help_text)
+        if field.errors:
+            data['errors'] = [force_unicode(error) for error in field.errors]
+        if isinstance(widget, PagedSelect):
+            data['choices_url'] = widget.url and force_unicode(widget.url)
+            data['value_label'] = force_unicode(widget.label(field.value()))
+        elif hasattr(widget, 'choices'):
+            data['choices'] = self.choices_name(field.html_name, widget.choices)
+        return data
+
+    def choices_name(self, name, choices):
+        # fields copy their choices, so equal choices of different fields
+        # are compared by value, e.g. of two fields with ``COUNTRIES``
+        key = id(choices)
+        if key not in self._choices_names:
+            data = json_choices(choices)
+            for other, other_data in self.choices.items():
+                if other_data == data:
+                    name = other
+                    break
+            else:
+                self.choices[name] = data
+            self._choices_names[key] = name
+        return self._choices_names[key]
+
+    def readonly(self, readonly):
+        data = {'kind': READONLY, 'label': force_unicode(readonly.label), 'fields': [
+            {'label': force_unicode(field['meta'].verbose_name), 'value': force_unicode(localize(field['value']))}
+            for field in readonly.fields
+        ]}
+        if readonly.help_text:
+            data['help_text'] = force_unicode(readonly.help_text)
+        return data
+
+    def as_dict(self):
+        form = {
+            'method': self.options.get('method'),
+            'action': self.options.get('action'),
+            'errors': [force_unicode(error) for error in self.form.non_field_errors()],
+        }
+        if self.options.get('inline'):
+            form['inline'] = True
+        return {'version': SCHEMA_VERSION, 'form': form, 'fieldsets': self.fieldsets, 'choices': self.choices}
+
+    def dumps(self):
+        output = force_unicode(json.dumps(self.as_dict(), separators=(',', ':'),
+            ensure_ascii=False, sort_keys=True))
+        for char, escape in ESCAPES:
+            output = output.replace(char, escape)
+        return output
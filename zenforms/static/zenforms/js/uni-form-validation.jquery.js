@@ -138,7 +138,7 @@ jQuery.fn.uniform = function (extended_settings) {
         validateMin : function (field, caption) {
             var min_val = this.get_val('validateMin', field.attr('class'), 0);
 
-            if ((parseInt(field.val(), 10) < min_val)) {
+            if ((parseFloat(field.val()) < min_val)) {
                 return i18n('min', caption, min_val);
             }
             return true;
@@ -168,7 +168,7 @@ jQuery.fn.uniform = function (extended_settings) {
         validateMax : function (field, caption) {
             var max_val = this.get_val('validateMax', field.attr('class'), 0);
 
-            if ((parseInt(field.val(), 10) > max_val)) {
+            if ((parseFloat(field.val()) > max_val)) {
                 return i18n('max', caption, max_val);
             }
             return true;
@@ -248,7 +248,7 @@ jQuery.fn.uniform = function (extended_settings) {
          * @param string caption
          */
         validateNumber : function (field, caption) {
-            if (field.val().match(/(^-?\d\d*\.\d*$)|(^-?\d\d*$)|(^-?\.\d\d*$)/) || field.val() === '') {
+            if (field.val().match(/^\s*[+\-]?(\d+\.?\d*|\.\d+)([eE][+\-]?\d+)?\s*$/) || field.val() === '') {
                 return true;
             }
             return i18n('number', caption);
@@ -261,7 +261,7 @@ jQuery.fn.uniform = function (extended_settings) {
          * @param string caption
          */
         validateInteger : function (field, caption) {
-            if (field.val().match(/(^-?\d\d*$)/) || field.val() === '') {
+            if (field.val().match(/^\s*[+\-]?\d+\s*$/) || field.val() === '') {
                 return true;
             }
             return i18n('integer', caption);
@@ -418,6 +418,20 @@ jQuery.fn.uniform = function (extended_settings) {
         return out;
     };
 
+    /**
+     * Class names of validators, fields without them are not validated on submit
+     * in lazy mode; fields with validators, which depend on other fields, are
+     * validated always
+     */
+    var validator_names = [];
+    for (var validator_name in this.validators) {
+        if (validator_name !== 'get_val') {
+            validator_names.push(validator_name);
+        }
+    }
+    var validated_classes = new RegExp(' (' + validator_names.join('|') + ') '),
+        dependent_classes = / (validateSameAs|validateCallback) /;
+
     return this.each(function () {
         var form = jQuery(this);
 
@@ -463,8 +477,11 @@ jQuery.fn.uniform = function (extended_settings) {
         /**
          * Select form fields and attach the higlighter functionality
          *
+         * In lazy mode only fields with default values are set up here,
+         * colors of other fields are read on their first focus: reading
+         * css of every field of a big form forces style recalculation
          */
-        form.find(settings.field_selector).each(function () {
+        form.find(settings.field_selector).filter(settings.lazy ? '[data-default-value]' : '*').each(function () {
             var $input = $(this),
                 value = $input.val();
 
@@ -530,7 +547,7 @@ jQuery.fn.uniform = function (extended_settings) {
             form.removeClass('askOnLeave');
 
             // remove the default values from the val() where they were being displayed
-            form.find(settings.field_selector).each(function () {
+            form.find(settings.field_selector).filter(settings.lazy ? '[data-default-value]' : '*').each(function () {
                 if ($(this).val() === $(this).data('default-value')) {
                     $(this).val('');
                 }
@@ -541,10 +558,20 @@ jQuery.fn.uniform = function (extended_settings) {
             // or if blur failed to fire correctly
             // You can turn on prevent_submit with either a class or with the uniform.settings
             if (settings.prevent_submit || form.hasClass('preventSubmit')) {
-                // use blur to run the validators on each field
-                form.find(settings.field_selector).each(function () {
-                    $(this).blur();
-                });
+                if (settings.lazy) {
+                    // validate fields, which were not validated with their current values
+                    form.find(settings.field_selector).each(function () {
+                        var $input = $(this);
+                        if (needs_validation($input)) {
+                            validate_field($input);
+                        }
+                    });
+                } else {
+                    // use blur to run the validators on each field
+                    form.find(settings.field_selector).each(function () {
+                        $(this).blur();
+                    });
+                }
 
                 // if we have a submit callback, we'll give it a chance to inspect the data now
                 if ($.isFunction(settings.submit_callback)) {
@@ -582,6 +609,18 @@ jQuery.fn.uniform = function (extended_settings) {
             return return_val;
         });
 
+        /**
+         * Holder with the focus class
+         *
+         * The form is searched for focused elements only before the first focus
+         */
+        var focused = null;
+
+        var unfocus = function () {
+            (focused || form.find('.' + settings.focused_class)).removeClass(settings.focused_class);
+            focused = jQuery([]);
+        };
+
         /**
          * Set the form focus class
          *
@@ -589,11 +628,15 @@ jQuery.fn.uniform = function (extended_settings) {
          *
          */
         form.delegate(settings.field_selector, 'focus', function () {
-            form.find('.' + settings.focused_class).removeClass(settings.focused_class);
+            unfocus();
 
             var $input = $(this);
 
-            $input.parents().filter('.' + settings.holder_class + ':first')
+            if ($input.data('default-color') === undefined) {
+                $input.data('default-color', $input.css('color'));
+            }
+
+            focused = $input.closest('.' + settings.holder_class)
                 .addClass(settings.focused_class);
 
             if ($input.val() === $input.data('default-value')) {
@@ -613,13 +656,44 @@ jQuery.fn.uniform = function (extended_settings) {
          *
          */
         form.delegate(settings.field_selector, 'blur', function () {
-            var $input = $(this),
-                has_validation = false,
+            // remove focus from form element
+            unfocus();
+
+            validate_field($(this));
+        });
+
+        /**
+         * Tells if the field should be validated on submit: it has validators
+         * and was not validated with its current value yet. Checkboxes, radio
+         * buttons and fields with validators, which look at other fields,
+         * are always validated.
+         *
+         * @param object $input jQuery form element
+         *
+         * @return bool
+         */
+        var needs_validation = function ($input) {
+            var classes = ' ' + $input.attr('class') + ' ';
+            if (!validated_classes.test(classes)) {
+                return false;
+            }
+            if (dependent_classes.test(classes) || $input.is(':checkbox, :radio')) {
+                return true;
+            }
+            return $input.data('validated-value') !== $input.val();
+        };
+
+        /**
+         * Run validators of a form field
+         *
+         * @param object $input jQuery form element
+         */
+        var validate_field = function ($input) {
+            var has_validation = false,
                 validator,
-                label = get_label_text($(this));
+                label = get_label_text($input);
 
-            // remove focus from form element
-            form.find('.' + settings.focused_class).removeClass(settings.focused_class);
+            $input.data('validated-value', $input.val());
 
             // (if empty or equal to default value) AND not required
             if (($input.val() === "" || $input.val() === $input.data('default-value'))
@@ -651,7 +725,7 @@ jQuery.fn.uniform = function (extended_settings) {
             // return the color to the default
             $input.css('color', $input.data('default-color'));
             return;
-        });
+        };
 
         /**
          * Handle a validation error in the form element
@@ -795,5 +869,6 @@ jQuery.fn.uniform.defaults = {
     focused_class           : 'focused',
     holder_class            : 'ctrlHolder',
     field_selector          : 'input, textarea, select',
-    default_value_color     : "#AFAFAF"
+    default_value_color     : "#AFAFAF",
+    lazy                    : true
 };
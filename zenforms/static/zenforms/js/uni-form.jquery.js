@@ -13,6 +13,9 @@
  * Modified by Jason Brumwell for optimization, addition
  * of valid and invalid states and default data attribues
  * 
+ * Lazy mode (default, ``lazy: false`` turns it off) sets up fields on
+ * their first focus instead of on init, for forms with thousands of fields
+ * 
  *
  * @see http://sprawsm.com/uni-form/
  * @license MIT http://www.opensource.org/licenses/mit-license.php
@@ -25,7 +28,8 @@ jQuery.fn.uniform = function(settings) {
         focused_class  : 'focused',
         holder_class   : 'ctrlHolder',
         field_selector : 'input, textarea, select',
-        default_value_color: "#AFAFAF"
+        default_value_color: "#AFAFAF",
+        lazy           : true
     }, settings);
   
     return this.each(function() {
@@ -50,13 +54,17 @@ jQuery.fn.uniform = function(settings) {
             };
 
         form.submit(function(){
-            form.find(settings.field_selector).each(function(){
+            // in lazy mode only fields with default values may show them
+            form.find(settings.field_selector).filter(settings.lazy ? '[data-default-value]' : '*').each(function(){
                 if($(this).val() == $(this).data('default-value')) $(this).val("");
             });
         })
 
-        // Select form fields and attach them higlighter functionality
-        form.find(settings.field_selector).not(':submit').each(function(){
+        // Select form fields and attach them higlighter functionality.
+        // In lazy mode only fields with default values are set up here, colors
+        // of other fields are read on their first focus: reading css of every
+        // field of a big form forces style recalculation for each of them
+        form.find(settings.field_selector).not(':submit').filter(settings.lazy ? '[data-default-value]' : '*').each(function(){
             var $input = $(this),
                 value = $input.val();
 
@@ -69,12 +77,24 @@ jQuery.fn.uniform = function(settings) {
             }
         })
 
+        // the focused holder is tracked, the form is searched for focused
+        // elements only before the first focus
+        var focused = null,
+            unfocus = function() {
+                (focused || form.find('.' + settings.focused_class)).removeClass(settings.focused_class);
+                focused = jQuery([]);
+            };
+
         form.delegate(settings.field_selector,'focus',function() {
-            form.find('.' + settings.focused_class).removeClass(settings.focused_class);
+            unfocus();
 
             var $input = $(this);
 
-            $input.parents().filter('.'+settings.holder_class+':first').addClass(settings.focused_class);
+            if ($input.data('default-color') === undefined) {
+                $input.data('default-color',$input.css('color'));
+            }
+
+            focused = $input.closest('.'+settings.holder_class).addClass(settings.focused_class);
             
             if($input.val() == $input.data('default-value')){
                 $input.val("");
@@ -85,7 +105,7 @@ jQuery.fn.uniform = function(settings) {
 
         form.delegate(settings.field_selector,'blur',function() {
             var $input = $(this);
-            form.find('.' + settings.focused_class).removeClass(settings.focused_class);
+            unfocus();
             if($input.val() == "" || $input.val() == $input.data('default-value')){
                 $input.not('select').css("color",settings.default_value_color);
                 $input.val($input.data('default-value'));
@@ -0,0 +1,95 @@
+/**
+ * Paged choices of ``PagedSelect`` widget for zenforms.
+ *
+ * Text input shows label of the selected value, hidden input next to it keeps
+ * the value. As user types, choices which labels start with typed text are
+ * loaded from ``data-choices-url`` page by page and shown in a list below
+ * the input. Clicking a choice selects it, clearing the input clears value.
+ */
+(function ($) {
+    var input_selector = 'input.pagedSelect',
+        list_class = 'pagedChoices',
+        timers = {};
+
+    var value_input = function (input) {
+        return input.next('input[type=hidden]');
+    };
+
+    var choices_list = function (input) {
+        var list = input.data('zenforms-list');
+        if (!list) {
+            list = $('<ul class="' + list_class + '"></ul>').hide().insertAfter(value_input(input));
+            list.delegate('li[data-value]', 'mousedown', function (event) {
+                var item = $(this);
+                event.preventDefault();
+                value_input(input).val(item.attr('data-value')).change();
+                input.val(item.text()).data('zenforms-label', item.text());
+                list.hide();
+            });
+            list.delegate('li.more', 'mousedown', function (event) {
+                event.preventDefault();
+                load(input, input.data('zenforms-page') + 1);
+            });
+            input.data('zenforms-list', list);
+        }
+        return list;
+    };
+
+    var load = function (input, page) {
+        var list = choices_list(input),
+            request = input.data('zenforms-request');
+        if (request) {
+            request.abort();
+        }
+        input.data('zenforms-request', $.ajax({
+            url: input.attr('data-choices-url'),
+            data: {zenforms_field: value_input(input).attr('name'), q: input.val(), page: page},
+            dataType: 'json',
+            success: function (data) {
+                if (page === 1) {
+                    list.empty();
+                }
+                list.find('li.more').remove();
+                $.each(data.results, function (i, choice) {
+                    $('<li></li>').attr('data-value', choice.value).text(choice.label).appendTo(list);
+                });
+                if (data.more) {
+                    $('<li class="more">&hellip;</li>').appendTo(list);
+                }
+                input.data('zenforms-page', data.page);
+                list.toggle(list.children().length > 0);
+            }
+        }));
+    };
+
+    $(document).delegate(input_selector, 'focus', function () {
+        var input = $(this);
+        if (input.data('zenforms-label') === undefined) {
+            input.data('zenforms-label', input.val());
+        }
+    });
+
+    $(document).delegate(input_selector, 'keyup', function (event) {
+        var input = $(this),
+            id = value_input(input).attr('name');
+        if (event.keyCode === 27) {
+            choices_list(input).hide();
+            return;
+        }
+        if (!input.val()) {
+            value_input(input).val('').change();
+            input.data('zenforms-label', '');
+        }
+        clearTimeout(timers[id]);
+        timers[id] = setTimeout(function () {
+            load(input, 1);
+        }, 200);
+    });
+
+    $(document).delegate(input_selector, 'blur', function () {
+        var input = $(this);
+        choices_list(input).hide();
+        // typed text, which is not a chosen label, doesn't change the value
+        input.val(input.data('zenforms-label') || '');
+    });
+}(jQuery));
@@ -0,0 +1,70 @@
+/**
+ * Server-side validation of single fields for zenforms.
+ *
+ * Forms rendered with ``validate_url`` option get ``validateFields`` class.
+ * When a field loses focus, serialized form and names of the fields of its
+ * ctrlHolder are posted to the validation url, and the ctrlHolder is replaced
+ * with the returned html.
+ */
+(function ($) {
+    var holder_selector = 'div.ctrlHolder',
+        field_selector = 'input, textarea, select',
+        pending = {};
+
+    var validate = function (form, holder) {
+        var names = [],
+            label = holder.find('p.fieldLabel').text(),
+            data = form.serializeArray(),
+            url = form.attr('data-validate-url');
+
+        holder.find(field_selector).each(function () {
+            var name = $(this).attr('name');
+            if (name && $.inArray(name, names) === -1) {
+                names.push(name);
+                data.push({name: 'zenforms_field', value: name});
+            }
+        });
+        if (!names.length) {
+            return;
+        }
+        if (label) {
+            data.push({name: 'zenforms_label', value: label});
+        }
+        if (pending[names[0]]) {
+            pending[names[0]].abort();
+        }
+        var request = pending[names[0]] = $.ajax({
+            type: 'POST',
+            url: url,
+            data: $.param(data),
+            dataType: 'html',
+            success: function (html) {
+                var focused = holder.find(document.activeElement).attr('id');
+                holder.replaceWith(html);
+                if (focused) {
+                    $('#' + focused).focus();
+                }
+            },
+            complete: function () {
+                if (pending[names[0]] === request) {
+                    delete pending[names[0]];
+                }
+            }
+        });
+    };
+
+    $(document).delegate('form.validateFields ' + field_selector, 'blur', function () {
+        var field = $(this),
+            holder = field.closest(holder_selector);
+        if (!holder.length || field.is(':submit, :button, [type=hidden]')) {
+            return;
+        }
+        // focus moves to the next element after blur; fields of one
+        // multifield are validated when the whole ctrlHolder is left
+        setTimeout(function () {
+            if (!holder.find(document.activeElement).length) {
+                validate(field.closest('form'), holder);
+            }
+        }, 0);
+    });
+}(jQuery));
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Chunked rendering of templates with zenforms tags.
+
+Zenforms tags have ``stream(context)`` method, which yields rendered form by
+chunks: prefix, every fieldset (or every form of formset) and postfix.
+``stream_template`` renders the template the same way as ``Template.render``
+does, but yields chunks of top-level nodes and of zenforms tags, so you can pass
+it to ``StreamingHttpResponse``::
+
+    def cards(request):
+        context = RequestContext(request, {'formset': CardFormset()})
+        return StreamingHttpResponse(stream_template('cards.html', context))
+
+Only top-level nodes are streamed, so template should not use ``{% extends %}``.
+"""
+from django.template import Node, loader
+from django.utils.encoding import force_unicode
+
+
+def stream_nodelist(nodelist, context):
+    for node in nodelist:
+        if hasattr(node, 'stream'):
+            chunks = node.stream(context)
+        elif isinstance(node, Node):
+            chunks = [nodelist.render_node(node, context)]
+        else:
+            chunks = [node]
+        for chunk in chunks:
+            if chunk:
+                yield force_unicode(chunk)
+
+
+def stream_template(template, context):
+    """
+    Yields chunks of rendered template, ``template`` is either template name
+    or ``Template`` instance.
+    """
+    if isinstance(template, basestring):
+        template = loader.get_template(template)
+    context.render_context.push()
+    try:
+        for chunk in stream_nodelist(template.nodelist, context):
+            yield chunk
+    finally:
+        context.render_context.pop()
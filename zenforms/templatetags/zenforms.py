@@ -1,12 +1,26 @@
 # -*- coding: utf-8 -*-
+from __future__ import absolute_import
 from classytags.core import Tag, Options
-from classytags.arguments import Argument, MultiValueArgument, MultiKeywordArgument
+from classytags.arguments import Argument, MultiValueArgument, MultiKeywordArgument, Flag
 from django import template
-from django.db.models.fields import FieldDoesNotExist
+from django.template import TextNode, Variable
+from django.conf import settings
 from django.forms.forms import BoundField
-from django.template import loader
-from django.utils.safestring import SafeUnicode
 from django import forms
+from django.utils.encoding import force_unicode
+from django.utils.safestring import mark_safe
+from zenforms.assets import asset_urls
+from zenforms.base import TemplateError, MultiField, ReadonlyField
+from zenforms.forms import ZenForm, ZenFormSet, ZenBoundField, parse_attrs, with_attrs
+from zenforms.fragments import fragment_key, render_cached
+from zenforms.instrumentation import InstrumentedTag, note_fields
+from zenforms.layout import UnusedFields, get_layout, resolve_fieldset
+from zenforms.loading import get_template
+from zenforms.media import media_deferred, get_collector, pop_collector
+from zenforms.readonly import readonly_context, iter_readonly_rows
+from zenforms.renderers import python_engine_enabled, iter_inline, render_readonly
+from zenforms.serialization import LayoutDocument
+from zenforms.streaming import stream_nodelist
 
 
 DEFAULT_OPTIONS = {
@@ -15,42 +29,35 @@ DEFAULT_OPTIONS = {
 }
 register = template.Library()
 
-class TemplateError(Exception):
-    pass
 
-
-class MultiField(object):
-    """
-    Inner object for ``MultifieldTag`` class rendering. You probably don't need to know about this class
+def layout_key(parser, token):
     """
-    multifield = True  # For easier template composing
-
-    def __init__(self, form, fields, label):
-        self.form = form
-        self.field_names = fields
-        self.label = label
-        self.fields = []
-        for field_name in self.field_names:
-            try:
-                self.fields.append(self.form[field_name])
-            except KeyError:
-                raise TemplateError('form does not contain field %s' % field_name)
-
-class ReadonlyField(object):
+    Key of layout plans of the tag: its position in template source. Unlike the node,
+    it stays the same, when template is compiled again.
     """
-    Inner object used for object representing in ``ReadonlyTag``.
-    You probably don't need to know about this class too.
-    """
-    readonly = True  # For easier template composing
+    counter = getattr(parser, '_zenforms_tags', 0)
+    parser._zenforms_tags = counter + 1
+    origin = getattr(token, 'source', (None,))[0]
+    return (getattr(origin, 'name', None), token.lineno, counter, token.contents)
 
-    def __init__(self, label, help_text, meta=None, value=None, fields=None):
-        self.label = label
-        self.help_text = help_text
-        self.meta = meta
-        self.value = value
-        self.fields = fields
 
-class ZenformTag(Tag):
+def static_fields(values):
+    """
+    Tells, whether ``{% fieldset %}`` arguments are field names and ``unused_fields`` only.
+    """
+    for value in values:
+        if value.var.filters:
+            return False
+        var = value.var.var
+        if isinstance(var, Variable):
+            if var.var != 'unused_fields':
+                return False
+        elif not isinstance(var, basestring):
+            return False
+    return True
+
+
+class ZenformTag(InstrumentedTag, Tag):
     """
     Zenform tag is main application tag, it starts with ``{% zenform %}`` and ends with ``{% endzenform %}``
 
@@ -79,41 +86,77 @@ class ZenformTag(Tag):
         forms.FloatField: 'textInput',
     }
 
-    def prepare_form(self, form):
-        for field in form:
-            css_class = ''
-            try:
-                css_class = self.field_mapping[type(field.field)]
-            except KeyError:
-                pass
-            if field.name in form.errors:
-                css_class += ' error'
-            if field.field.required:
-                css_class += ' required'
-
-            if 'class' in field.field.widget.attrs:
-                field.field.widget.attrs['class'] += ' %s' % css_class
-            else:
-                field.field.widget.attrs['class'] = ' %s' % css_class
-        return form
+    def __init__(self, parser, tokens):
+        self.layout_key = layout_key(parser, tokens)
+        super(ZenformTag, self).__init__(parser, tokens)
 
-    def render_tag(self, context, form, options, nodelist):
+    def prepare_form(self, form):
+        """
+        Wraps form, so its fields are rendered with css classes from ``field_mapping``.
+        Form and its widgets are not modified.
+        """
+        return ZenForm(form, self.field_mapping)
+
+    def stream(self, context):
+        """
+        Renders tag by chunks, see ``zenforms.streaming``.
+        """
+        kwargs = dict([(key, value.resolve(context)) for key, value in self.kwargs.items()])
+        kwargs.update(self.blocks)
+        return self.stream_fragment(context, kwargs)
+
+    def render_tag(self, context, **kwargs):
+        return mark_safe(u''.join(self.stream_fragment(context, kwargs)))
+
+    def stream_fragment(self, context, kwargs):
+        """
+        Takes unbound form from fragment cache, when ``cache`` option is set.
+        Deferred media is registered here, so it's collected on cache hits too.
+        Contents of block tags are cached too, so their ``cache`` option must be
+        a name, which tells different blocks apart.
+        """
+        options = kwargs['options']
+        form = kwargs.get('form', kwargs.get('formset'))
+        if media_deferred(options):
+            get_collector(context).add(form, options)
+            kwargs['options'] = options = dict(options, defer=True)
+        if options.get('cache') and 'nodelist' in kwargs and not isinstance(options['cache'], basestring):
+            raise TemplateError("cache option of {%% %s %%} must be a name, e.g. cache='signup'" % self.name)
+        if not options.get('cache') or form.is_bound:
+            return self.stream_tag(context, **kwargs)
+        key = fragment_key(self.name, form, options)
+        render = lambda: u''.join(self.stream_tag(context, **kwargs))
+        return [render_cached(key, context, render, options.get('cache_timeout'))]
+
+    def stream_tag(self, context, form, options, nodelist):
         context.push()
-        real_options = DEFAULT_OPTIONS.copy()
-        real_options.update(options)
-        context['form'] = self.prepare_form(form)
-        context['options'] = real_options
-        context['unused_fields'] = form.fields.keys()
-        output = self.render_prefix(context) + nodelist.render(context) + self.render_postfix(context)
-        context.pop()
-        return output
+        try:
+            real_options = DEFAULT_OPTIONS.copy()
+            real_options.update(options)
+            context['form'] = self.prepare_form(form)
+            context['options'] = real_options
+            context['unused_fields'] = unused_fields = UnusedFields(form.fields)
+            context['layout_plan'] = get_layout(self.layout_key, form)
+            if real_options.get('format') == 'json':
+                # fieldsets add their fields to the document instead of rendering
+                context['layout_document'] = document = LayoutDocument(context['form'], real_options)
+                nodelist.render(context)
+                yield document.dumps()
+            else:
+                yield self.render_prefix(context)
+                for chunk in stream_nodelist(nodelist, context):
+                    yield chunk
+                yield self.render_postfix(context)
+            unused_fields.report()
+        finally:
+            context.pop()
 
     def render_prefix(self, context):
-        template = loader.get_template('zenforms/zenform_prefix.html')
+        template = get_template('zenforms/zenform_prefix.html')
         return template.render(context)
 
     def render_postfix(self, context):
-        template = loader.get_template('zenforms/zenform_postfix.html')
+        template = get_template('zenforms/zenform_postfix.html')
         return template.render(context)
 
 
@@ -125,23 +168,107 @@ class InlineZenformTag(ZenformTag):
         MultiKeywordArgument('options', required=False, default=DEFAULT_OPTIONS),
     )
 
-    def render_tag(self, context, form, options):
+    def stream_tag(self, context, form, options):
+        context.push()
+        try:
+            real_options = DEFAULT_OPTIONS.copy()
+            real_options.update({'izenform': True})
+            real_options.update(options)
+            context['form'] = self.prepare_form(form)
+            context['fields'] = context['form']
+            context['options'] = real_options
+            note_fields(len(form.fields))
+            if real_options.get('format') == 'json':
+                document = LayoutDocument(context['form'], real_options)
+                document.add_fieldset(context['fields'])
+                yield document.dumps()
+            else:
+                yield self.render_prefix(context)
+                for chunk in self.stream_inline(context, real_options):
+                    yield chunk
+                yield self.render_postfix(context)
+        finally:
+            context.pop()
+
+    def stream_inline(self, context, options):
+        if python_engine_enabled():
+            return iter_inline(context['fields'], options)
+        return [get_template('zenforms/zenform_inline.html').render(context)]
+
+
+class ZenformsetTag(InlineZenformTag):
+    """
+    ``{% zenformset %}`` renders all forms of the formset in one html form.
+    Management form is rendered once, tag contents are rendered for every
+    form of formset with the same layout plan. Without contents each form
+    is rendered like ``{% izenform %}`` does.
+
+    **Usage**::
+
+        {% zenformset formset [options key1=value1, key2=value2] %}
+            {% fieldset unused_fields title 'Card' %}
+        {% endzenformset %}
+
+    """
+    name = 'zenformset'
+    options = Options(
+        Argument('formset'),
+        'options',
+        MultiKeywordArgument('options', required=False, default=DEFAULT_OPTIONS),
+        blocks=[('endzenformset', 'nodelist')],
+    )
+
+    def is_empty(self, nodelist):
+        for node in nodelist:
+            if not isinstance(node, TextNode) or node.s.strip():
+                return False
+        return True
+
+    def stream_tag(self, context, formset, options, nodelist):
+        context.push()
+        try:
+            real_options = DEFAULT_OPTIONS.copy()
+            real_options.update(options)
+            context['form'] = ZenFormSet(formset)
+            context['options'] = real_options
+            yield self.render_prefix(context)
+            yield force_unicode(formset.management_form)
+            if self.is_empty(nodelist):
+                for form in formset.forms:
+                    yield self.render_inline_row(context, form, real_options)
+            else:
+                layouts = {}
+                for form in formset.forms:
+                    yield self.render_row(context, form, nodelist, layouts)
+            yield self.render_postfix(context)
+        finally:
+            context.pop()
+
+    def render_row(self, context, form, nodelist, layouts):
+        # all forms of formset usually have the same fields,
+        # so layout plan is looked up once per formset render
+        field_names = tuple(form.fields)
+        if field_names not in layouts:
+            layouts[field_names] = get_layout(self.layout_key, form)
         context.push()
-        real_options = DEFAULT_OPTIONS.copy()
-        real_options.update({'izenform': True})
-        real_options.update(options)
         context['form'] = self.prepare_form(form)
-        context['fields'] = context['form']
-        context['options'] = real_options
-        prefix = self.render_prefix(context)
-        postfix = self.render_postfix(context)
-        content = loader.get_template('zenforms/zenform_inline.html').render(context)
-        output = prefix + content + postfix
+        context['unused_fields'] = unused_fields = UnusedFields(form.fields)
+        context['layout_plan'] = layouts[field_names]
+        output = nodelist.render(context)
+        unused_fields.report()
         context.pop()
         return output
 
+    def render_inline_row(self, context, form, options):
+        context.push()
+        context['form'] = context['fields'] = self.prepare_form(form)
+        note_fields(len(form.fields))
+        output = u''.join(self.stream_inline(context, options))
+        context.pop()
+        return output
 
-class MultifieldTag(Tag):
+
+class MultifieldTag(InstrumentedTag, Tag):
     """
     ``{% multifield %}`` tag allows you to group fields in form.
     For example, first name and last name in your login form.
@@ -172,7 +299,7 @@ class MultifieldTag(Tag):
         return u''
 
 
-class FieldsetTag(Tag):
+class FieldsetTag(InstrumentedTag, Tag):
     """
     FieldsetTag renders fieldset with specified fields in it.
 
@@ -189,25 +316,15 @@ class FieldsetTag(Tag):
     )
     template = 'zenforms/fieldset.html'
 
-    def udpate_context(self, fields, form, tag_context, unused_fields):
-        if type(fields) is list and fields[0] == unused_fields:
-            # ``unused_fields`` is the argument
-            iterable = tuple(unused_fields)
-        else:
-            iterable = fields
-        for field in iterable:
-            try:
-                if type(field) in [SafeUnicode, str]:
-                    tag_context['fields'].append(form[field])
-                    unused_fields.remove(field)
-                elif type(field) is MultiField:
-                    tag_context['fields'].append(field)
-                    for fname in field.field_names:
-                        unused_fields.remove(fname)
-                elif type(field) is ReadonlyField:
-                    tag_context['fields'].append(field)
-            except KeyError:
-                raise TemplateError('form does not contain field %s' % field)
+    def __init__(self, parser, tokens):
+        self.layout_key = layout_key(parser, tokens)
+        super(FieldsetTag, self).__init__(parser, tokens)
+        self.static = static_fields(self.kwargs['fields'])
+
+    def udpate_context(self, fields, form, tag_context, unused_fields, layout=None):
+        bound_fields = resolve_fieldset(self.layout_key, fields, form, unused_fields, layout, self.static)
+        note_fields(sum(len(getattr(field, 'field_names', [None])) for field in bound_fields))
+        tag_context['fields'].extend(bound_fields)
 
     def get_context(self, context, title, fields):
         tag_context = {'fields': [], 'title': title}
@@ -216,18 +333,25 @@ class FieldsetTag(Tag):
             unused_fields = context['unused_fields']
         except KeyError:
             raise TemplateError('fieldset tag must be used in {% zenform %}{% endzenform %} context')
-        self.udpate_context(fields, form, tag_context, unused_fields)
+        layout = context.get('layout_plan')
+        self.udpate_context(fields, form, tag_context, unused_fields, layout)
         context.update(tag_context)
         return context
 
     def render_tag(self, context, title, fields):
         context = self.get_context(context, title, fields)
-        template = loader.get_template(self.template)
-        output = template.render(context)
+        document = context.get('layout_document')
+        if document is not None:
+            document.add_fieldset(context['fields'], title)
+            output = u''
+        else:
+            template = get_template(self.template)
+            output = template.render(context)
+        context.pop()  # pushed by ``context.update`` in ``get_context``
         return output
 
 
-class Submit(Tag):
+class Submit(InstrumentedTag, Tag):
     name = 'submit'
     template = 'zenforms/submit.html'
     options = Options(
@@ -237,13 +361,13 @@ class Submit(Tag):
     def render_tag(self, context, value):
         context.push()
         context['value'] = value
-        template = loader.get_template(self.template)
+        template = get_template(self.template)
         output = template.render(context)
         context.pop()
         return output
 
 
-class ReadonlyTag(Tag):
+class ReadonlyTag(InstrumentedTag, Tag):
     name = 'readonly'
     template = 'zenforms/fields/readonly.html'
     options = Options(
@@ -251,61 +375,170 @@ class ReadonlyTag(Tag):
         MultiValueArgument('fields'),
         'label',
         Argument('label', required=False, default=None),
+        'display',
+        Flag('display', true_values=['choices'], false_values=['values'], default=None),
         'as',
         Argument('varname', resolve=False, required=False, default=None),
     )
 
-    def get_context(self, instance, field_names, label):
-        opts = instance._meta
-        context = {}
-        fields = []
-        for fname in field_names:
-            try:
-                f = opts.get_field_by_name(fname)[0]
-            except FieldDoesNotExist:
-                raise TemplateError('Field %s not exists in a model' % fname)
-            else:
-                fields.append({'value': f.value_from_object(instance), 'meta': f})
+    def get_context(self, instance, field_names, label, display=None):
+        return readonly_context(instance, field_names, label, display)
 
-        context['fields'] = fields
-        if label:
-            context['label'] = label
-        else:
-            context['label'] = fields[0]['meta'].verbose_name
-
-        context['help_text'] = fields[0]['meta'].help_text
-        return context
-
-    def render_tag(self, context, instance, fields, label, varname):
-        ctx = self.get_context(instance, fields, label)
+    def render_tag(self, context, instance, fields, label, display, varname):
+        ctx = self.get_context(instance, fields, label, display)
+        note_fields(len(fields))
         if varname:
             context[varname] = ReadonlyField(**ctx)
             return u''
         else:
             context.push()
             context.update({'readonly': ctx})
-            template = loader.get_template(self.template)
+            template = get_template(self.template)
             output = template.render(context)
             context.pop()
             return output
 
+
+class ReadonlyListTag(InstrumentedTag, Tag):
+    """
+    Renders every row of the queryset with ``{% readonly %}`` markup. Only listed
+    columns are selected and rows are fetched with ``iterator()``, streamed
+    tag yields html of ``ZENFORMS_READONLY_LIST_CHUNK`` rows at once.
+
+    **Usage**::
+
+        {% readonly_list queryset 'field1' 'field2' [label 'MyLabel'] [display choices|values] %}
+    """
+    name = 'readonly_list'
+    template = 'zenforms/fields/readonly.html'
+    options = Options(
+        Argument('queryset'),
+        MultiValueArgument('fields'),
+        'label',
+        Argument('label', required=False, default=None),
+        'display',
+        Flag('display', true_values=['choices'], false_values=['values'], default=None),
+    )
+
+    def stream(self, context):
+        kwargs = dict([(key, value.resolve(context)) for key, value in self.kwargs.items()])
+        return self.stream_tag(context, **kwargs)
+
+    def render_tag(self, context, **kwargs):
+        return mark_safe(u''.join(self.stream_tag(context, **kwargs)))
+
+    def stream_tag(self, context, queryset, fields, label, display):
+        chunk_size = getattr(settings, 'ZENFORMS_READONLY_LIST_CHUNK', 100)
+        if python_engine_enabled():
+            render = render_readonly
+        else:
+            template = get_template(self.template)
+            def render(readonly):
+                context['readonly'] = readonly
+                return template.render(context)
+        context.push()
+        try:
+            chunk = []
+            for readonly in iter_readonly_rows(queryset, fields, label, display):
+                chunk.append(render(readonly))
+                if len(chunk) == chunk_size:
+                    note_fields(chunk_size * len(fields))
+                    yield u''.join(chunk)
+                    chunk = []
+            if chunk:
+                note_fields(len(chunk) * len(fields))
+                yield u''.join(chunk)
+        finally:
+            context.pop()
+
+class ZenformsAssets(Tag):
+    """
+    Links uni-form css and javascript. Built bundles are used, if
+    ``zenforms_assets`` command was run, otherwise original static files.
+
+    **Usage:** ::
+
+        {% zenforms_assets [theme='dark'] [validation=1] [lang='de'] %}
+    """
+    name = 'zenforms_assets'
+    template = 'zenforms/assets.html'
+    options = Options(
+        MultiKeywordArgument('assets', required=False, default={}),
+    )
+
+    def render_tag(self, context, assets):
+        css, js = asset_urls(assets.get('theme') or 'default', assets.get('lang'), bool(assets.get('validation')))
+        context.update({'css': css, 'js': js})
+        template = get_template(self.template)
+        output = template.render(context)
+        context.pop()
+        return output
+
+class ZenformsFooter(Tag):
+    """
+    Renders media of all forms on the page and one ``uniform()`` call, when
+    media is deferred (``ZENFORMS_DEFER_MEDIA = True`` or ``defer`` option).
+    Put it at the end of the page, after all forms.
+
+    **Usage:** ::
+
+        {% zenforms_footer %}
+    """
+    name = 'zenforms_footer'
+    template = 'zenforms/footer.html'
+
+    def render_tag(self, context):
+        collector = pop_collector(context)
+        context.update({'media': collector.media, 'init': collector.init})
+        template = get_template(self.template)
+        output = template.render(context)
+        context.pop()
+        return output
+
 @register.filter
 def widget_type(field):
+    if isinstance(field, ZenBoundField):
+        return field.widget_type
     if isinstance(field, BoundField):
         return str(field.field.widget.__class__.__name__)
 
+class ZfieldTag(Tag):
+    """
+    Renders field widget with extra attributes. Attribute names are parsed
+    once, when template is compiled; field and its widget are not changed.
+
+    **Usage:** ::
+
+        {% zfield form.field class="x" data-foo="y" %}
+        {% zfield form.field class="x" as field %}
+    """
+    name = 'zfield'
+    options = Options(
+        Argument('field'),
+        MultiKeywordArgument('attrs', required=False, default={}),
+        'as',
+        Argument('varname', resolve=False, required=False, default=None),
+    )
+
+    def render_tag(self, context, field, attrs, varname):
+        field = with_attrs(field, attrs)
+        if varname:
+            context[varname] = field
+            return u''
+        return unicode(field)
+
 @register.filter
 def attrs(field, attribute_description):
-    attributes = attribute_description.split(",")
-    for attribute in attributes:
-        attr_name, attr_value = attribute.split('=')
-        attr_value = attr_value.strip('"').strip("'")
-        field.field.widget.attrs[attr_name] = attr_value
-    return field
+    return with_attrs(field, parse_attrs(attribute_description))
 
 register.tag(ZenformTag)
 register.tag(InlineZenformTag)
+register.tag(ZenformsetTag)
 register.tag(MultifieldTag)
 register.tag(FieldsetTag)
 register.tag(Submit)
 register.tag(ReadonlyTag)
+register.tag(ReadonlyListTag)
+register.tag(ZfieldTag)
+register.tag(ZenformsAssets)
+register.tag(ZenformsFooter)
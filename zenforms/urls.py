@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+from django.conf.urls.defaults import *
+
+urlpatterns = patterns('zenforms.views',
+    url(r'^bundles/(?P<path>[\w.-]+)$', 'bundle', name='zenforms_bundle'),
+)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from django.utils.importlib import import_module
+
+try:
+    from collections import OrderedDict
+except ImportError:  # Python < 2.7
+    from django.utils.datastructures import SortedDict as OrderedDict
+
+
+class LRUCache(object):
+    """
+    Small thread-safe mapping, which keeps at most ``maxsize`` recently used
+    entries. It counts hits and misses, so you can check how well it works.
+    """
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        self._lock.acquire()
+        try:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data[key] = value
+            self.hits += 1
+            return value
+        finally:
+            self._lock.release()
+
+    def set(self, key, value):
+        self._lock.acquire()
+        try:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                del self._data[iter(self._data).next()]
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        self._lock.acquire()
+        try:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+        }
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+
+def import_path(path):
+    """
+    Imports object by its dotted path, e.g. ``'myapp.forms.SignupForm'``.
+    """
+    module, name = path.rsplit('.', 1)
+    return getattr(import_module(module), name)
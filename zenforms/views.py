@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+import json
+import mimetypes
+import os
+import time
+
+from django.http import HttpResponse, HttpResponseBadRequest, Http404
+from django.template import Context
+from django.utils.http import http_date
+from django.views.generic import View
+
+from zenforms.assets import bundle_root
+from zenforms.base import MultiField
+from zenforms.choices import search_choices
+from zenforms.forms import ZenForm, clean_fields
+from zenforms.layout import TEMPLATES, FIELD, MULTIFIELD
+from zenforms.loading import get_template
+from zenforms.renderers import python_engine_enabled, render_single, render_multi
+from zenforms.templatetags.zenforms import ZenformTag
+
+YEAR = 365 * 24 * 60 * 60
+
+
+def bundle(request, path):
+    """
+    Serves built asset bundles with far-future cache headers. Gzipped copy is
+    sent to clients, which accept it. Use it only if bundles are not served by
+    web server.
+    """
+    if os.path.basename(path) != path or path.startswith('.'):
+        raise Http404
+    filename = os.path.join(bundle_root(), path)
+    if not os.path.isfile(filename):
+        raise Http404
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    gzipped = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '') and os.path.isfile(filename + '.gz')
+    if gzipped:
+        filename += '.gz'
+    response = HttpResponse(open(filename, 'rb').read(), content_type=content_type)
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    response['Vary'] = 'Accept-Encoding'
+    response['Cache-Control'] = 'public, max-age=%d' % YEAR
+    response['Expires'] = http_date(time.time() + YEAR)
+    return response
+
+
+def render_ctrl_holder(field):
+    """
+    Renders ``ctrlHolder`` of a bound field or multifield.
+    """
+    if getattr(field, 'multifield', False):
+        render, template = render_multi, TEMPLATES[MULTIFIELD]
+    else:
+        render, template = render_single, TEMPLATES[FIELD]
+    if python_engine_enabled():
+        return render(field).strip()
+    return get_template(template).render(Context({'field': field})).strip()
+
+
+class FieldValidationMixin(object):
+    """
+    Validates one field (or fields of one multifield) of ``form_class`` and
+    returns its ``ctrlHolder`` html with errors, or json with errors when
+    ``format=json`` is requested. Request is the serialized form plus names of
+    validated fields in ``zenforms_field`` parameter, other fields are not
+    cleaned, except listed in ``validation_dependencies``::
+
+        class SignupView(FieldValidationMixin, FormView):
+            form_class = SignupForm
+            validation_dependencies = {'password2': ['password1']}
+
+    POST requests without ``zenforms_field`` are passed to the view's ``post``.
+    """
+    form_class = None
+    validation_dependencies = {}
+    field_parameter = 'zenforms_field'
+    label_parameter = 'zenforms_label'
+
+    def get_validation_form(self):
+        if hasattr(self, 'get_form_kwargs'):  # FormMixin
+            return self.get_form_class()(**self.get_form_kwargs())
+        return self.form_class(self.request.POST, self.request.FILES)
+
+    def post(self, request, *args, **kwargs):
+        if self.field_parameter in request.POST:
+            return self.validate_fields(request.POST.getlist(self.field_parameter))
+        handler = getattr(super(FieldValidationMixin, self), 'post', None)
+        if handler is None:
+            return HttpResponseBadRequest()
+        return handler(request, *args, **kwargs)
+
+    def validate_fields(self, html_names):
+        form = self.get_validation_form()
+        # fields are submitted with html names, which may have form prefix
+        names = dict((form.add_prefix(name), name) for name in form.fields)
+        fields = []
+        for html_name in html_names:
+            if html_name not in names:
+                return HttpResponseBadRequest()
+            if names[html_name] not in fields:
+                fields.append(names[html_name])
+        cleaned = []
+        for name in fields:
+            for dependency in self.validation_dependencies.get(name, ()):
+                if dependency not in cleaned and dependency not in fields:
+                    cleaned.append(dependency)
+        errors = clean_fields(form, cleaned + fields)
+        if self.request.REQUEST.get('format') == 'json':
+            payload = {
+                'valid': not any(name in errors for name in fields),
+                'errors': dict((name, list(errors[name])) for name in fields if name in errors),
+            }
+            return HttpResponse(json.dumps(payload), content_type='application/json')
+        return HttpResponse(self.render_fields(form, fields))
+
+    def render_fields(self, form, fields):
+        zenform = ZenForm(form, ZenformTag.field_mapping)
+        if len(fields) == 1:
+            return render_ctrl_holder(zenform[fields[0]])
+        label = self.request.POST.get(self.label_parameter)
+        return render_ctrl_holder(MultiField(zenform, fields, label))
+
+
+class FieldValidationView(FieldValidationMixin, View):
+    """
+    Standalone field validation endpoint, see ``FieldValidationMixin``.
+    """
+    http_method_names = ['post']
+
+
+class ChoicesMixin(object):
+    """
+    Returns json page of choices of ``form_class`` field for ``PagedSelect``
+    widget. Request parameters are html name of the field in ``zenforms_field``,
+    prefix of labels in ``q`` and number of page in ``page``::
+
+        {"results": [{"value": "5", "label": "Fiji"}], "page": 1, "more": false}
+
+    Labels of static choices are searched in the index, querysets are filtered
+    by ``search_field`` of the widget. GET requests without ``zenforms_field``
+    are passed to the view's ``get``.
+    """
+    form_class = None
+    paginate_by = 50
+    field_parameter = 'zenforms_field'
+
+    def get_choices_form(self):
+        if hasattr(self, 'get_form_kwargs'):  # FormMixin
+            return self.get_form_class()(**self.get_form_kwargs())
+        return self.form_class()
+
+    def get(self, request, *args, **kwargs):
+        if self.field_parameter in request.GET:
+            return self.choices(request.GET[self.field_parameter])
+        handler = getattr(super(ChoicesMixin, self), 'get', None)
+        if handler is None:
+            return HttpResponseBadRequest()
+        return handler(request, *args, **kwargs)
+
+    def choices(self, html_name):
+        request = self.request
+        form = self.get_choices_form()
+        names = dict((form.add_prefix(name), name) for name in form.fields)
+        if html_name not in names:
+            return HttpResponseBadRequest()
+        field = form.fields[names[html_name]]
+        if not hasattr(field, 'choices'):
+            return HttpResponseBadRequest()
+        try:
+            page = max(1, int(request.GET.get('page', 1)))
+        except ValueError:
+            return HttpResponseBadRequest()
+        results, more = search_choices(field, request.GET.get('q', u'').strip(), page, self.paginate_by)
+        payload = {
+            'results': [{'value': value, 'label': label} for value, label in results],
+            'page': page,
+            'more': more,
+        }
+        return HttpResponse(json.dumps(payload), content_type='application/json')
+
+
+class ChoicesView(ChoicesMixin, View):
+    """
+    Standalone choices endpoint, see ``ChoicesMixin``.
+    """
+    http_method_names = ['get']
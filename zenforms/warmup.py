@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Warm-up of zenforms caches.
+
+The first render of a zenform in a process looks up and compiles zenforms
+templates and computes css classes, validation rules and cached options of
+every field. ``warmup()`` does it beforehand. Call it in ``wsgi.py`` of a
+server, which loads application before forking workers (gunicorn with
+``--preload``, uwsgi without ``lazy-apps``), and workers share the warmed
+state copy-on-write::
+
+    application = get_wsgi_application()
+
+    from zenforms.warmup import warmup
+    warmup()
+
+Form classes are listed in ``ZENFORMS_WARMUP_FORMS`` setting.
+"""
+from django.conf import settings
+from django.forms.models import ModelChoiceIterator
+
+from zenforms.assets import load_manifest
+from zenforms.choices import PagedSelect, options_cached, render_options, get_index
+from zenforms.forms import css_class_for, validation_classes
+from zenforms.loading import get_template
+from zenforms.renderers import stock_templates, templates_overridden
+from zenforms.templatetags.zenforms import ZenformTag
+from zenforms.utils import import_path
+
+
+def warm_templates():
+    """
+    Compiles all zenforms templates (or their overrides) into the registry.
+    """
+    names = stock_templates()
+    for name in names:
+        get_template(name)
+    templates_overridden()
+    load_manifest()
+    return names
+
+
+def warm_form(form_class):
+    """
+    Computes metadata of fields of the form class, or of the form class of
+    formset class. Returns number of fields.
+    """
+    form_class = getattr(form_class, 'form', form_class)
+    fields = form_class.base_fields.values()
+    for field in fields:
+        css_class_for(type(field), ZenformTag.field_mapping)
+        validation_classes(field)
+        widget = field.widget
+        if options_cached(widget):
+            render_options(widget, (), ())
+        elif isinstance(widget, PagedSelect) and not isinstance(widget.choices, ModelChoiceIterator):
+            get_index(widget.choices)
+    return len(fields)
+
+
+def warmup(form_classes=None):
+    """
+    Warms zenforms templates and metadata of ``form_classes`` (classes or
+    their dotted paths), ``ZENFORMS_WARMUP_FORMS`` setting by default.
+    """
+    if form_classes is None:
+        form_classes = getattr(settings, 'ZENFORMS_WARMUP_FORMS', [])
+    templates = warm_templates()
+    fields = 0
+    for form_class in form_classes:
+        if isinstance(form_class, basestring):
+            form_class = import_path(form_class)
+        fields += warm_form(form_class)
+    return {'templates': len(templates), 'forms': len(form_classes), 'fields': fields}
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Compile-time whitespace stripping of zenforms templates.
+
+Zenforms templates are indented for humans, and their ``{% if %}`` and
+``{% include %}`` scaffolding leaves blank lines and indentation around every
+field. With ``ZENFORMS_STRIP_WHITESPACE = True`` text nodes of compiled
+templates (and templates they include) are stripped once, when the template
+registry loads them:
+
+* whitespace between tags is removed, as ``{% spaceless %}`` does;
+* whitespace between a tag and a template tag or variable is removed, as is
+  whitespace with line breaks between template tags;
+* other whitespace runs are collapsed into one space, so spaces of attributes
+  and of inline text (``{{ field }} {{ field.label }}``) are kept.
+
+Content of ``<pre>``, ``<textarea>``, ``<script>`` and ``<style>`` elements is
+left alone. Rendered variables, e.g. widgets html, are not changed.
+"""
+import re
+
+from django.template import TextNode, VariableNode
+from django.template.loader_tags import ConstantIncludeNode
+
+PRESERVED = re.compile(r'<(/?)(pre|textarea|script|style)\b[^>]*>', re.IGNORECASE)
+BETWEEN_TAGS = re.compile(r'>\s+<')
+LEADING = re.compile(r'^\s+<')
+TRAILING = re.compile(r'>\s+$')
+SPACES = re.compile(r'\s+')
+
+
+def _strip(text):
+    # text is surrounded by template tags, variables or preserved elements
+    text = LEADING.sub('<', TRAILING.sub('>', BETWEEN_TAGS.sub('><', text)))
+    return SPACES.sub(' ', text)
+
+
+def strip_text(text, preserved=None):
+    """
+    Strips text of one text node. ``preserved`` is the name of element, which
+    content is left alone and which is not closed yet. Returns stripped text
+    and name of preserved element, which is not closed in the text.
+    """
+    bits = []
+    position = 0
+    for match in PRESERVED.finditer(text):
+        closing, tag = match.group(1), match.group(2).lower()
+        if preserved:
+            if closing and tag == preserved:
+                bits.append(text[position:match.end()])
+                position = match.end()
+                preserved = None
+        elif not closing:
+            # with ``<`` of the tag, so whitespace before the tag is seen as such
+            bits.append(_strip(text[position:match.start() + 1])[:-1])
+            bits.append(match.group(0))
+            position = match.end()
+            preserved = tag
+    rest = text[position:]
+    if preserved:
+        bits.append(rest)
+    else:
+        bits.append(_strip(rest))
+    return u''.join(bits), preserved
+
+
+def _text_nodes(nodelist, includes):
+    """
+    Yields text nodes with their previous and next sibling nodes.
+    """
+    nodes = list(nodelist)
+    for index, node in enumerate(nodes):
+        if isinstance(node, TextNode):
+            previous = index and nodes[index - 1] or None
+            following = index + 1 < len(nodes) and nodes[index + 1] or None
+            yield node, previous, following
+        elif isinstance(node, ConstantIncludeNode):
+            if node.template is not None:
+                includes.append(node.template)
+        else:
+            for attr in getattr(node, 'child_nodelists', ()):
+                for child in _text_nodes(getattr(node, attr, None) or (), includes):
+                    yield child
+
+
+def strip_whitespace(template):
+    """
+    Strips text nodes of compiled template and templates it includes with
+    constant ``{% include %}`` tags. Stripping is idempotent.
+    """
+    includes = []
+    preserved = None
+    for node, previous, following in _text_nodes(template.nodelist, includes):
+        if (not preserved and node.s.isspace() and '\n' in node.s
+                and not (isinstance(previous, VariableNode) and isinstance(following, VariableNode))):
+            node.s = u''
+        else:
+            node.s, preserved = strip_text(node.s, preserved)
+    for included in includes:
+        strip_whitespace(included)